@@ -8,19 +8,17 @@ import config
 from AnonXMusic import LOGGER, app, userbot
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import sudo
+from AnonXMusic.platforms.metadata import metadata
 from AnonXMusic.plugins import ALL_MODULES
 from AnonXMusic.utils.database import get_banned_users, get_gbanned
+from AnonXMusic.utils.scheduler import scheduler
+from AnonXMusic.utils.stream.persist import restore_queues, save_queues
+from AnonXMusic.utils.stream.prefetch import refresh_stream_urls
 from config import BANNED_USERS
 
 
 async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
+    if not config.STRING_SESSIONS:
         LOGGER(__name__).error("Assistant client variables not defined, exiting...")
         exit()
     await sudo()
@@ -49,11 +47,23 @@ async def init():
     except:
         pass
     await Anony.decorators()
+    await restore_queues()
+    scheduler.every("save_queues", config.QUEUE_SNAPSHOT_INTERVAL, save_queues)
+    scheduler.every("save_metadata", 300, metadata.save)
+    scheduler.every("stream_urls", 300, refresh_stream_urls)
     LOGGER("AnonXMusic").info(
         "\x41\x6e\x6f\x6e\x58\x20\x4d\x75\x73\x69\x63\x20\x42\x6f\x74\x20\x53\x74\x61\x72\x74\x65\x64\x20\x53\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x6c\x79\x2e\n\n\x44\x6f\x6e'\x74\x20\x66\x6f\x72\x67\x65\x74\x20\x74\x6f\x20\x76\x69\x73\x69\x74\x20\x40\x46\x61\x6c\x6c\x65\x6e\x41\x73\x73\x6f\x63\x69\x61\x74\x69\x6f\x6e"
     )
     await idle()
+    try:
+        await save_queues()
+        await metadata.save()
+    except:
+        pass
     await app.stop()
+    await asyncio.gather(
+        *(worker.stop() for worker in Anony.workers), return_exceptions=True
+    )
     await userbot.stop()
     LOGGER("AnonXMusic").info("Stopping AnonX Music Bot...")
 
@@ -4,36 +4,59 @@ from datetime import datetime, timedelta
 from typing import Union
 
 from pyrogram import Client
+from pyrogram.errors import UserAlreadyParticipant, UserNotParticipant
 from pyrogram.types import InlineKeyboardMarkup
 from pytgcalls import PyTgCalls
 from pytgcalls.exceptions import (
+    AlreadyJoinedError,
     NoActiveGroupCall,
 )
 from ntgcalls import TelegramServerError
 from pytgcalls.types import Update, StreamEnded
 from pytgcalls import filters as fl
-from pytgcalls.types import AudioQuality, VideoQuality
-from pytgcalls.types import MediaStream,ChatUpdate
+from pytgcalls.types import ChatUpdate
 
 import config
-from config import autoclean
-from AnonXMusic import LOGGER, YouTube, app
+from AnonXMusic import LOGGER, YouTube, app, userbot
+from AnonXMusic.core.userbot import (
+    assistantids,
+    assistants,
+    mark_joined,
+    mark_left,
+    start_concurrently,
+)
+from AnonXMusic.core.worker import CallWorker, WorkerAssistant, build_stream
 from AnonXMusic.misc import db
+from AnonXMusic.utils.admission import admit, release, setup_slot
 from AnonXMusic.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    assistantdict,
+    get_client,
     get_lang,
     get_loop,
     group_assistant,
     is_autoend,
+    is_music_playing,
     music_on,
+    recorded_assistant,
     remove_active_chat,
     remove_active_video_chat,
+    set_assistant_new,
     set_loop,
 )
+from AnonXMusic.utils.edits import dispatcher
 from AnonXMusic.utils.exceptions import AssistantErr
 from AnonXMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
 from AnonXMusic.utils.inline.play import stream_markup
+from AnonXMusic.utils.metrics import timer
+from AnonXMusic.utils.stream import autoclear
+from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.prefetch import (
+    clear_prepared,
+    schedule_prefetch,
+    take_prepared,
+)
 from AnonXMusic.utils.thumbnails import get_thumb
 from strings import get_string
 from AnonXMusic.platforms.Youtube import cookie_txt_file
@@ -41,65 +64,117 @@ from AnonXMusic.platforms.Youtube import cookie_txt_file
 autoend = {}
 counter = {}
 
+LEAVE_TIMEOUT = 10
+
+
+def stream_spec(link, video=None, ffmpeg_parameters=None, cookies=None):
+    return {
+        "link": link,
+        "video": bool(video),
+        "ffmpeg_parameters": ffmpeg_parameters,
+        "ytdlp_parameters": f"--cookies {cookie_txt_file()}" if cookies else None,
+    }
+
 
 async def _clear_(chat_id):
+    for track in db.get(chat_id) or []:
+        await auto_clean(track)
     db[chat_id] = []
+    clear_prepared(chat_id)
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
 
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="AnonXAss1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="AnonXAss2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="AnonXAss3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="AnonXAss4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
-        )
-        self.userbot5 = Client(
-            name="AnonXAss5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-        )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
+        self.userbots = {}
+        self.calls = {}
+        self.workers = []
+        # chat_id -> numbers of the assistants currently streaming there
+        self.in_call = {}
+        if config.CALL_WORKERS:
+            numbers = list(config.STRING_SESSIONS)
+            for index in range(min(config.CALL_WORKERS, len(numbers))):
+                sessions = {
+                    num: config.STRING_SESSIONS[num]
+                    for num in numbers[index :: config.CALL_WORKERS]
+                }
+                worker = CallWorker(
+                    index,
+                    config.API_ID,
+                    config.API_HASH,
+                    sessions,
+                    config.STARTUP_CONCURRENCY,
+                    config.STARTUP_TIMEOUT,
+                )
+                self.workers.append(worker)
+                self.calls.update(worker.assistants)
+            return
+        for num, session in config.STRING_SESSIONS.items():
+            self.userbots[num] = Client(
+                name=f"AnonXAss{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+            )
+            self.calls[num] = PyTgCalls(
+                self.userbots[num],
+                cache_duration=100,
+            )
+
+    def assistant_number(self, assistant) -> int:
+        for num, call in self.calls.items():
+            if call is assistant:
+                return num
+
+    async def _play(self, assistant, chat_id: int, spec: dict):
+        num = self.assistant_number(assistant)
+        with timer("play", chat_id, num):
+            if isinstance(assistant, WorkerAssistant):
+                result = await assistant.play(chat_id, spec)
+            else:
+                result = await assistant.play(chat_id, build_stream(spec))
+        self.in_call.setdefault(chat_id, set()).add(num)
+        mark_joined(num, chat_id)
+        return result
+
+    def _drop_holder(self, chat_id: int, num: int):
+        holders = self.in_call.get(chat_id)
+        if holders is not None:
+            holders.discard(num)
+            if not holders:
+                self.in_call.pop(chat_id, None)
+
+    async def _leave(self, assistant, chat_id: int):
+        result = await assistant.leave_call(chat_id)
+        self._drop_holder(chat_id, self.assistant_number(assistant))
+        return result
+
+    async def leave_all(self, chat_id: int, timeout: float = LEAVE_TIMEOUT):
+        holders = set(self.in_call.get(chat_id, ()))
+        if not holders:
+            # Nothing recorded (e.g. after a restart): the chat's own assistant is the likely one
+            owner = await recorded_assistant(chat_id)
+            if owner:
+                holders = {int(owner)}
+        numbers = [num for num in holders if num in self.calls]
+        if not numbers:
+            return
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(self.calls[num].leave_call(chat_id), timeout)
+                for num in numbers
+            ),
+            return_exceptions=True,
         )
+        for num, result in zip(numbers, results):
+            # A timed out leave may still be in the call, so keep it on record
+            if not isinstance(result, asyncio.TimeoutError):
+                self._drop_holder(chat_id, num)
+
+    async def _send_photo(self, stream_chat: int, assistant: int, **kwargs):
+        with timer("send_photo", stream_chat, assistant):
+            return await app.send_photo(**kwargs)
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -113,36 +188,12 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         try:
             await _clear_(chat_id)
-            await assistant.leave_call(chat_id)
+            await self._leave(assistant, chat_id)
         except:
             pass
 
     async def stop_stream_force(self, chat_id: int):
-        try:
-            if config.STRING1:
-                await self.one.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_call(chat_id)
-        except:
-            pass
+        await self.leave_all(chat_id)
         try:
             await _clear_(chat_id)
         except:
@@ -188,24 +239,13 @@ class Call(PyTgCalls):
         dur = int(dur)
         played, con_seconds = speed_converter(playing[0]["played"], speed)
         duration = seconds_to_min(dur)
-        stream = (
-            MediaStream(
-                out,
-                audio_parameters=AudioQuality.HIGH,
-                video_parameters=VideoQuality.SD_480p,
-                ffmpeg_parameters=f"-ss {played} -to {duration}",
-
-            )
-            if playing[0]["streamtype"] == "video"
-            else MediaStream(
-                out,
-                audio_parameters=AudioQuality.HIGH,
-                ffmpeg_parameters=f"-ss {played} -to {duration}",
-                video_flags=MediaStream.Flags.IGNORE
-            )
+        stream = stream_spec(
+            out,
+            video=playing[0]["streamtype"] == "video",
+            ffmpeg_parameters=f"-ss {played} -to {duration}",
         )
         if str(db[chat_id][0]["file"]) == str(file_path):
-            await assistant.play(chat_id, stream)
+            await self._play(assistant, chat_id, stream)
         else:
             raise AssistantErr("Umm")
         if str(db[chat_id][0]["file"]) == str(file_path):
@@ -223,13 +263,13 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         try:
             check = db.get(chat_id)
-            check.pop(0)
+            await auto_clean(check.pop(0))
         except:
             pass
         await remove_active_video_chat(chat_id)
         await remove_active_chat(chat_id)
         try:
-            await assistant.leave_call(chat_id)
+            await self._leave(assistant, chat_id)
         except:
             pass
 
@@ -241,46 +281,166 @@ class Call(PyTgCalls):
         image: Union[bool, str] = None,
     ):
         assistant = await group_assistant(self, chat_id)
-        if video:
-            stream = MediaStream(
-                link,
-                audio_parameters=AudioQuality.HIGH,
-                video_parameters=VideoQuality.SD_480p,
-            )
-        else:
-            stream = MediaStream(link, audio_parameters=AudioQuality.HIGH,video_flags=MediaStream.Flags.IGNORE, ytdlp_parameters=f"--cookies {cookie_txt_file()}")
-        await assistant.play(
-            chat_id,
-            stream,
-        )
+        stream = stream_spec(link, video=video, cookies=not video)
+        await self._play(assistant, chat_id, stream)
 
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
-        stream = (
-            MediaStream(
-                file_path,
-                audio_parameters=AudioQuality.HIGH,
-                video_parameters=VideoQuality.SD_480p,
-                ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
-            if mode == "video"
-            else MediaStream(
-                file_path,
-                audio_parameters=AudioQuality.HIGH,
-                video_flags=MediaStream.Flags.IGNORE,
-                ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+        stream = stream_spec(
+            file_path,
+            video=mode == "video",
+            ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+        )
+        await self._play(assistant, chat_id, stream)
+
+    async def _ensure_member(self, assistant: int, chat_id: int):
+        userbot = await get_client(assistant)
+        try:
+            await app.get_chat_member(chat_id, userbot.id)
+            return mark_joined(assistant, chat_id)
+        except UserNotParticipant:
+            mark_left(assistant, chat_id)
+        chat = await app.get_chat(chat_id)
+        if chat.username:
+            invitelink = chat.username
+        else:
+            invitelink = await app.export_chat_invite_link(chat_id)
+        try:
+            await userbot.join_chat(invitelink)
+        except UserAlreadyParticipant:
+            pass
+        mark_joined(assistant, chat_id)
+        try:
+            await userbot.resolve_peer(chat_id)
+        except:
+            pass
+
+    async def _resume_spec(self, playing: list) -> dict:
+        current = playing[0]
+        video = str(current["streamtype"]) == "video"
+        if current.get("speed_path") and not os.path.isfile(current["speed_path"]):
+            # The sped-up copy is gone; go on from the same spot at normal speed
+            current["played"] = int(int(current.get("played", 0)) * current["speed"])
+            current["dur"] = current["old_dur"]
+            current["seconds"] = current["old_second"]
+            current["speed_path"] = None
+            current["speed"] = 1.0
+        file_path = current.get("speed_path") or current["file"]
+        if (
+            current["vidid"] not in ["telegram", "soundcloud"]
+            and not file_path.startswith("http")
+            and not any(mark in file_path for mark in ["live_", "vid_", "index_"])
+            and not os.path.isfile(file_path)
+        ):
+            # Downloads may be wiped across a restart; fetch the track again
+            file_path, direct = await YouTube.download(
+                current["vidid"], None, videoid=True, video=video
             )
+            if direct and file_path != current["file"]:
+                autoclear.release(current["file"])
+                autoclear.hold(file_path)
+                current["file"] = file_path
+        seekable = True
+        if "live_" in file_path or "vid_" in file_path:
+            n, file_path = await YouTube.video(current["vidid"], True)
+            if n == 0:
+                raise AssistantErr(file_path)
+            seekable = "live_" not in current["file"]
+        elif "index_" in file_path:
+            file_path = current["vidid"]
+            seekable = False
+        played = int(current.get("played", 0))
+        ffmpeg_parameters = None
+        if seekable and played > 0 and int(current.get("seconds", 0)) > 0:
+            ffmpeg_parameters = f"-ss {seconds_to_min(played)} -to {current['dur']}"
+        return stream_spec(
+            file_path,
+            video=video,
+            ffmpeg_parameters=ffmpeg_parameters,
+            cookies=not video,
         )
-        await assistant.play(chat_id, stream)
+
+    async def migrate_stream(self, chat_id: int, target: int = None) -> int:
+        from AnonXMusic.core.userbot import assistants
+        from AnonXMusic.utils.placement import pick_assistant
+
+        playing = db.get(chat_id)
+        if not playing:
+            raise AssistantErr("Nothing is playing in this chat.")
+        source = assistantdict.get(chat_id)
+        if target is None:
+            target = pick_assistant(chat_id, exclude=[source])
+        if target is None or int(target) not in assistants:
+            raise AssistantErr("No other assistant is available.")
+        target = int(target)
+        if target == source:
+            raise AssistantErr("The chat is already on that assistant.")
+        await self._ensure_member(target, chat_id)
+        stream = await self._resume_spec(playing)
+        old = self.calls.get(source)
+        new = self.calls[target]
+        if old:
+            try:
+                await self._leave(old, chat_id)
+            except:
+                pass
+        try:
+            await self._play(new, chat_id, stream)
+        except Exception as e:
+            if old:
+                try:
+                    await self._play(old, chat_id, await self._resume_spec(playing))
+                except:
+                    pass
+            raise AssistantErr(f"Migration failed: {type(e).__name__}")
+        assistantdict[chat_id] = target
+        await set_assistant_new(chat_id, target)
+        if not await is_music_playing(chat_id):
+            try:
+                await new.pause(chat_id)
+            except:
+                pass
+        LOGGER(__name__).info(f"Moved {chat_id} from assistant {source} to {target}")
+        return target
+
+    async def worker_respawned(self, worker, started: list):
+        # Calls die with the worker process; replay each chat it was streaming
+        for chat_id, holders in list(self.in_call.items()):
+            lost = holders & set(worker.assistants)
+            if not lost:
+                continue
+            holders -= lost
+            if not holders:
+                self.in_call.pop(chat_id, None)
+            if assistantdict.get(chat_id) not in lost:
+                continue
+            try:
+                if assistantdict[chat_id] not in started:
+                    raise AssistantErr("The assistant did not come back.")
+                await self.restart_stream(chat_id)
+            except:
+                try:
+                    await self.stop_stream(chat_id)
+                except:
+                    pass
+
+    async def restart_stream(self, chat_id: int):
+        playing = db.get(chat_id)
+        if not playing:
+            raise AssistantErr("Nothing is playing in this chat.")
+        assistant = await group_assistant(self, chat_id)
+        await self._play(assistant, chat_id, await self._resume_spec(playing))
+        if not await is_music_playing(chat_id):
+            try:
+                await assistant.pause(chat_id)
+            except:
+                pass
 
     async def stream_call(self, link):
         assistant = await group_assistant(self, config.LOGGER_ID)
-        await assistant.play(
-            config.LOGGER_ID,
-            MediaStream(link)
-        )
+        await self._play(assistant, config.LOGGER_ID, stream_spec(link, video=True))
         await asyncio.sleep(0.2)
-        await assistant.leave_call(config.LOGGER_ID)
+        await self._leave(assistant, config.LOGGER_ID)
 
         
 
@@ -301,7 +461,7 @@ class Call(PyTgCalls):
                     stream_markup_timer(_, chat_id, played, duration)
                 )
                 
-                await message.edit_reply_markup(reply_markup=markup)
+                dispatcher.submit(message, markup)
                 await asyncio.sleep(1)  # Update every second
                 
         except Exception as e:
@@ -332,48 +492,40 @@ class Call(PyTgCalls):
         link,
         video: Union[bool, str] = None,
         image: Union[bool, str] = None,
+        mystic=None,
     ):
         assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
-        if video:
-            stream= MediaStream(
-                link,
-                audio_parameters=AudioQuality.HIGH,video_parameters=VideoQuality.SD_480p
-                )
-            # stream = AudioVideoPiped(
-            #     link,
-            #     audio_parameters=HighQualityAudio(),
-            #     video_parameters=MediumQualityVideo(),
-            # )
-        else:
-            stream = (
-                MediaStream(
-                    link,
-                    audio_parameters=AudioQuality.HIGH,
-                    video_parameters=VideoQuality.SD_480p,
-                    
-                )
-                if video
-                else MediaStream(link, audio_parameters=AudioQuality.HIGH,video_flags=MediaStream.Flags.IGNORE, ytdlp_parameters=f"--cookies {cookie_txt_file()}")
-            )
+
+        async def on_wait(position):
+            if mystic:
+                await mystic.edit_text(_["call_11"].format(position))
+
+        num = await admit(chat_id, on_wait)
+        if num is None:
+            raise AssistantErr(_["call_12"])
+        joined = False
         try:
-            await assistant.play(
-                chat_id,
-                stream
-            )
-            # await assistant.join_group_call(
-            #     chat_id,
-            #     stream,
-            #     stream_type=StreamType().pulse_stream,
-            # )
-        except NoActiveGroupCall:
-            raise AssistantErr(_["call_8"])
-        except AlreadyJoinedError:
-            raise AssistantErr(_["call_9"])
-        except TelegramServerError:
-            raise AssistantErr(_["call_10"])
-        await add_active_chat(chat_id)
+            if self.calls.get(num) is not assistant:
+                await self._ensure_member(num, chat_id)
+                assistantdict[chat_id] = num
+                await set_assistant_new(chat_id, num)
+                assistant = self.calls[num]
+            stream = stream_spec(link, video=video, cookies=not video)
+            async with setup_slot(num):
+                try:
+                    await self._play(assistant, chat_id, stream)
+                except NoActiveGroupCall:
+                    raise AssistantErr(_["call_8"])
+                except AlreadyJoinedError:
+                    raise AssistantErr(_["call_9"])
+                except TelegramServerError:
+                    raise AssistantErr(_["call_10"])
+            await add_active_chat(chat_id)
+            joined = True
+        finally:
+            release(chat_id, freed=not joined)
         await music_on(chat_id)
         if video:
             await add_active_video_chat(chat_id)
@@ -383,26 +535,31 @@ class Call(PyTgCalls):
             if users == 1:
                 autoend[chat_id] = datetime.now() + timedelta(minutes=1)
 
+    async def on_stream_end(self, client, chat_id):
+        with timer("switch", chat_id, self.assistant_number(client)):
+            await self.change_stream(client, chat_id)
+
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
         popped = None
+        num = self.assistant_number(client)
         loop = await get_loop(chat_id)
         try:
             if loop == 0:
-                popped = check.pop(0)
+                with timer("queue_pop", chat_id, num):
+                    popped = check.pop(0)
             else:
                 loop = loop - 1
                 await set_loop(chat_id, loop)
             if popped:
-                rem = popped["file"]
-                autoclean.remove(rem)
+                await auto_clean(popped)
             if not check:
                 await _clear_(chat_id)
-                return await client.leave_call(chat_id)
+                return await self._leave(client, chat_id)
         except:
             try:
                 await _clear_(chat_id)
-                return await client.leave_call(chat_id)
+                return await self._leave(client, chat_id)
             except:
                 return
         else:
@@ -411,7 +568,6 @@ class Call(PyTgCalls):
             _ = get_string(language)
             title = (check[0]["title"]).title()
             user = check[0]["by"]
-            user_id = check[0]["user_id"]
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
             videoid = check[0]["vidid"]
@@ -423,35 +579,34 @@ class Call(PyTgCalls):
                 db[chat_id][0]["speed_path"] = None
                 db[chat_id][0]["speed"] = 1.0
             video = True if str(streamtype) == "video" else False
+            # The next prefetch is scheduled once this track is resolved, so a
+            # prefetch still fetching it is joined rather than cancelled
+            ready = take_prepared(chat_id, check[0])
             if "live_" in queued:
-                n, link = await YouTube.video(videoid, True)
-                if n == 0:
-                    return await app.send_message(
-                        original_chat_id,
-                        text=_["call_6"],
-                    )
-                if video:
-                    stream = MediaStream(
-                        link,
-                        audio_parameters=AudioQuality.HIGH,
-                        video_parameters=VideoQuality.SD_480p,
-                    )
+                if ready:
+                    link = ready["link"]
                 else:
-                    stream = MediaStream(
-                        link,
-                        audio_parameters=AudioQuality.HIGH,
-                        ytdlp_parameters=f"--cookies {cookie_txt_file()}"
-                    )
+                    with timer("resolve", chat_id, num):
+                        n, link = await YouTube.video(videoid, True)
+                    if n == 0:
+                        return await app.send_message(
+                            original_chat_id,
+                            text=_["call_6"],
+                        )
+                schedule_prefetch(chat_id)
+                stream = stream_spec(link, video=video, cookies=not video)
                 try:
-                    await client.play(chat_id, stream)
+                    await self._play(client, chat_id, stream)
                 except Exception:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid,user_id)
+                img = (ready and ready["img"]) or await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                run = await app.send_photo(
+                run = await self._send_photo(
+                    chat_id,
+                    num,
                     chat_id=original_chat_id,
                     photo=img,
                     caption=_["stream_1"].format(
@@ -465,41 +620,40 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             elif "vid_" in queued:
-                mystic = await app.send_message(original_chat_id, _["call_7"])
-                try:
-                    file_path, direct = await YouTube.download(
-                        videoid,
-                        mystic,
-                        videoid=True,
-                        video=True if str(streamtype) == "video" else False,
-                    )
-                except:
-                    return await mystic.edit_text(
-                        _["call_6"], disable_web_page_preview=True
-                    )
-                if video:
-                    stream = MediaStream(
-                        file_path,
-                        audio_parameters=AudioQuality.HIGH,
-                        video_parameters=VideoQuality.SD_480p,
-                    )
+                mystic = None
+                if ready:
+                    file_path = ready["link"]
                 else:
-                    stream = MediaStream(
-                        file_path,
-                        audio_parameters=AudioQuality.HIGH,
-                        ytdlp_parameters=f"--cookies {cookie_txt_file()}"
-                    )
+                    mystic = await app.send_message(original_chat_id, _["call_7"])
+                    try:
+                        with timer("resolve", chat_id, num):
+                            file_path, direct = await YouTube.download(
+                                videoid,
+                                mystic,
+                                videoid=True,
+                                video=True if str(streamtype) == "video" else False,
+                                chat_id=chat_id,
+                            )
+                    except:
+                        return await mystic.edit_text(
+                            _["call_6"], disable_web_page_preview=True
+                        )
+                schedule_prefetch(chat_id)
+                stream = stream_spec(file_path, video=video, cookies=not video)
                 try:
-                    await client.play(chat_id, stream)
+                    await self._play(client, chat_id, stream)
                 except:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid,user_id)
+                img = (ready and ready["img"]) or await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                await mystic.delete()
-                run = await app.send_photo(
+                if mystic:
+                    await mystic.delete()
+                run = await self._send_photo(
+                    chat_id,
+                    num,
                     chat_id=original_chat_id,
                     photo=img,
                     caption=_["stream_1"].format(
@@ -513,24 +667,19 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "stream"
             elif "index_" in queued:
-                stream = (
-                    MediaStream(
-                        videoid,
-                        audio_parameters=AudioQuality.HIGH,
-                        video_parameters=VideoQuality.SD_480p,
-                    )
-                    if str(streamtype) == "video"
-                    else MediaStream(videoid, audio_parameters=AudioQuality.HIGH, ytdlp_parameters=f"--cookies {cookie_txt_file()}")
-                )
+                schedule_prefetch(chat_id)
+                stream = stream_spec(videoid, video=video, cookies=not video)
                 try:
-                    await client.play(chat_id, stream)
+                    await self._play(client, chat_id, stream)
                 except:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
                 button = stream_markup(_, chat_id)
-                run = await app.send_photo(
+                run = await self._send_photo(
+                    chat_id,
+                    num,
                     chat_id=original_chat_id,
                     photo=config.STREAM_IMG_URL,
                     caption=_["stream_2"].format(user),
@@ -539,20 +688,10 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             else:
-                if video:
-                    stream = MediaStream(
-                        queued,
-                        audio_parameters=AudioQuality.HIGH,
-                        video_parameters=VideoQuality.SD_480p,
-                    )
-                else:
-                    stream = MediaStream(
-                        queued,
-                        audio_parameters=AudioQuality.HIGH,
-                        ytdlp_parameters=f"--cookies {cookie_txt_file()}"
-                    )
+                schedule_prefetch(chat_id)
+                stream = stream_spec(queued, video=video, cookies=not video)
                 try:
-                    await client.play(chat_id, stream)
+                    await self._play(client, chat_id, stream)
                 except:
                     return await app.send_message(
                         original_chat_id,
@@ -560,7 +699,9 @@ class Call(PyTgCalls):
                     )
                 if videoid == "telegram":
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await self._send_photo(
+                        chat_id,
+                        num,
                         chat_id=original_chat_id,
                         photo=config.TELEGRAM_AUDIO_URL
                         if str(streamtype) == "audio"
@@ -574,7 +715,9 @@ class Call(PyTgCalls):
                     db[chat_id][0]["markup"] = "tg"
                 elif videoid == "soundcloud":
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await self._send_photo(
+                        chat_id,
+                        num,
                         chat_id=original_chat_id,
                         photo=config.SOUNCLOUD_IMG_URL,
                         caption=_["stream_1"].format(
@@ -585,9 +728,11 @@ class Call(PyTgCalls):
                     db[chat_id][0]["mystic"] = run
                     db[chat_id][0]["markup"] = "tg"
                 else:
-                    img = await get_thumb(videoid,user_id)
+                    img = (ready and ready["img"]) or await get_thumb(videoid)
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await self._send_photo(
+                        chat_id,
+                        num,
                         chat_id=original_chat_id,
                         photo=img,
                         caption=_["stream_1"].format(
@@ -601,74 +746,75 @@ class Call(PyTgCalls):
                     db[chat_id][0]["mystic"] = run
                     db[chat_id][0]["markup"] = "stream"
 
+    def assistant_ping(self, assistant: int):
+        return self.calls[int(assistant)].ping
+
     async def ping(self):
-        pings = []
-        if config.STRING1:
-            pings.append(self.one.ping)
-        if config.STRING2:
-            pings.append(self.two.ping)
-        if config.STRING3:
-            pings.append(self.three.ping)
-        if config.STRING4:
-            pings.append(self.four.ping)
-        if config.STRING5:
-            pings.append(self.five.ping)
+        pings = [call.ping for call in self.calls.values()]
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("Starting PyTgCalls Client...\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        if self.workers:
+            results = await asyncio.gather(
+                *(worker.start() for worker in self.workers), return_exceptions=True
+            )
+            started = []
+            for worker, result in zip(self.workers, results):
+                if isinstance(result, BaseException):
+                    LOGGER(__name__).error(
+                        f"Call worker {worker.index} failed to start: {type(result).__name__} {result}"
+                    )
+                    continue
+                started.extend(result or [])
+                LOGGER(__name__).info(
+                    f"Call worker {worker.index} started assistants {result} of {list(worker.sessions)}"
+                )
+        else:
+            for num in list(self.calls):
+                if num not in assistants:
+                    self.calls.pop(num)
+                    self.userbots.pop(num, None)
+            started = await start_concurrently(
+                "Call client", self.calls, lambda num, call: call.start()
+            )
+        for num in list(self.calls):
+            if num not in started or num not in assistants:
+                self.calls.pop(num)
+                self.userbots.pop(num, None)
+                if num in assistants:
+                    assistants.remove(num)
+                    client_id = getattr(userbot.clients.get(num), "id", None)
+                    if client_id in assistantids:
+                        assistantids.remove(client_id)
+        if not self.calls:
+            LOGGER(__name__).error("No call client could be started, exiting...")
+            exit()
 
     async def decorators(self):
-        @self.one.on_update(
-                fl.chat_update(
-                    ChatUpdate.Status.KICKED | 
-                    ChatUpdate.Status.LEFT_GROUP | 
-                    ChatUpdate.Status.CLOSED_VOICE_CHAT
-                    ))
-        @self.two.on_update(
-                fl.chat_update(
-                    ChatUpdate.Status.KICKED | 
-                    ChatUpdate.Status.LEFT_GROUP | 
-                    ChatUpdate.Status.CLOSED_VOICE_CHAT
-                    ))
-        @self.three.on_update(
-                fl.chat_update(
-                    ChatUpdate.Status.KICKED | 
-                    ChatUpdate.Status.LEFT_GROUP | 
-                    ChatUpdate.Status.CLOSED_VOICE_CHAT
-                    ))
-        @self.four.on_update(
-                fl.chat_update(
-                    ChatUpdate.Status.KICKED | 
-                    ChatUpdate.Status.LEFT_GROUP | 
-                    ChatUpdate.Status.CLOSED_VOICE_CHAT
-                    ))
-        @self.five.on_update(
-                fl.chat_update(
-                    ChatUpdate.Status.KICKED | 
-                    ChatUpdate.Status.LEFT_GROUP | 
-                    ChatUpdate.Status.CLOSED_VOICE_CHAT
-                    ))
         async def stream_services_handler(client, update: Update):
             await self.stop_stream(update.chat_id)
 
-        @self.one.on_update(fl.stream_end())
-        @self.two.on_update(fl.stream_end())
-        @self.three.on_update(fl.stream_end())
-        @self.four.on_update(fl.stream_end())
-        @self.five.on_update(fl.stream_end())
-        async def stream_end_handler1(client:PyTgCalls, update: StreamEnded):
-            await self.change_stream(client, update.chat_id)
+        async def stream_end_handler1(client: PyTgCalls, update: StreamEnded):
+            await self.on_stream_end(client, update.chat_id)
+
+        for worker in self.workers:
+            worker.handlers["respawned"] = self.worker_respawned
+            worker.handlers["stream_end"] = self.on_stream_end
+            worker.handlers["chat_update"] = lambda client, chat_id: self.stop_stream(
+                chat_id
+            )
+        if self.workers:
+            return
+        for call in self.calls.values():
+            call.on_update(
+                fl.chat_update(
+                    ChatUpdate.Status.KICKED
+                    | ChatUpdate.Status.LEFT_GROUP
+                    | ChatUpdate.Status.CLOSED_VOICE_CHAT
+                )
+            )(stream_services_handler)
+            call.on_update(fl.stream_end())(stream_end_handler1)
 
 
 Anony = Call()
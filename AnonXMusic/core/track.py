@@ -0,0 +1,154 @@
+import random
+import time
+from collections import deque
+from itertools import islice
+
+
+class Track:
+    """A queue entry. Fields are read and written like dict keys, so existing
+    code indexing `db[chat_id][0]["title"]` keeps working.
+
+    `played` is not stored: it is worked out from a monotonic clock that is
+    re-anchored whenever it is assigned and stops while the chat is paused."""
+
+    FIELDS = (
+        "title",
+        "dur",
+        "streamtype",
+        "by",
+        "user_id",
+        "chat_id",
+        "file",
+        "vidid",
+        "seconds",
+        "played",
+        "speed",
+        "speed_path",
+        "old_dur",
+        "old_second",
+        "mystic",
+        "markup",
+    )
+    __slots__ = tuple(field for field in FIELDS if field != "played") + (
+        "_offset",
+        "_started",
+    )
+
+    def __init__(self, **fields):
+        self._offset = 0
+        self._started = time.monotonic()
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{key: value for key, value in data.items() if key in cls.FIELDS})
+
+    @property
+    def played(self) -> int:
+        played = self._offset
+        if self._started is not None:
+            played += time.monotonic() - self._started
+        seconds = int(self.get("seconds") or 0)
+        if seconds > 0:
+            played = min(played, seconds)
+        return int(played)
+
+    @played.setter
+    def played(self, value):
+        self._offset = int(value)
+        if self._started is not None:
+            self._started = time.monotonic()
+
+    @property
+    def paused(self) -> bool:
+        return self._started is None
+
+    def pause(self):
+        if self._started is not None:
+            self._offset = self.played
+            self._started = None
+
+    def resume(self):
+        if self._started is None:
+            self._started = time.monotonic()
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS and hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key, default)
+
+    def keys(self):
+        return [key for key in self.FIELDS if hasattr(self, key)]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def __repr__(self):
+        return f"Track({self.get('title')!r}, {self.get('vidid')!r})"
+
+
+class ChatQueue(deque):
+    """A chat's queue. Taking the current track off the front is O(1)."""
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is None and (index.start or 0) >= 0 and (
+                index.stop is None or index.stop >= 0
+            ):
+                return list(islice(self, index.start, index.stop))
+            return list(self)[index]
+        return super().__getitem__(index)
+
+    def pop(self, index: int = -1):
+        if index == 0:
+            return self.popleft()
+        if index == -1 or index == len(self) - 1:
+            return super().pop()
+        item = self[index]
+        del self[index]
+        return item
+
+    def insert(self, index: int, item):
+        if index == 0:
+            return self.appendleft(item)
+        return super().insert(index, item)
+
+    def shuffle(self):
+        items = list(self)
+        random.shuffle(items)
+        self.clear()
+        self.extend(items)
+
+
+def as_track(item):
+    if isinstance(item, dict):
+        return Track.from_dict(item)
+    return item
+
+
+class QueueDB(dict):
+    """The `db` registry. Lists assigned to it become ChatQueues of Tracks."""
+
+    def __setitem__(self, chat_id, queue):
+        if not isinstance(queue, ChatQueue):
+            queue = ChatQueue(as_track(item) for item in queue)
+        super().__setitem__(chat_id, queue)
@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 from pyrogram import Client
 
 import config
@@ -6,165 +9,103 @@ from ..logging import LOGGER
 
 assistants = []
 assistantids = []
+# assistant number -> {chat_id: monotonic time it last joined or streamed there}
+joined = {}
+
+
+def mark_joined(num: int, chat_id: int, when: float = None):
+    joined.setdefault(num, {})[chat_id] = time.monotonic() if when is None else when
+
+
+def mark_left(num: int, chat_id: int):
+    joined.get(num, {}).pop(chat_id, None)
+
+
+async def start_concurrently(label: str, clients: dict, start) -> list:
+    semaphore = asyncio.Semaphore(max(1, config.STARTUP_CONCURRENCY))
+
+    async def run(num, client):
+        async with semaphore:
+            begin = time.monotonic()
+            try:
+                await asyncio.wait_for(start(num, client), config.STARTUP_TIMEOUT)
+            except Exception as e:
+                LOGGER(__name__).error(
+                    f"{label} {num} failed to start after {time.monotonic() - begin:.2f}s: {type(e).__name__} {e}"
+                )
+                return None
+            LOGGER(__name__).info(
+                f"{label} {num} started in {time.monotonic() - begin:.2f}s"
+            )
+            return num
+
+    started = await asyncio.gather(
+        *(run(num, client) for num, client in clients.items())
+    )
+    return [num for num in started if num is not None]
 
 
 class Userbot(Client):
     def __init__(self):
-        self.one = Client(
-            name="AnonXAss1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-            no_updates=True,
-        )
-        self.two = Client(
-            name="AnonXAss2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-            no_updates=True,
-        )
-        self.three = Client(
-            name="AnonXAss3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-            no_updates=True,
-        )
-        self.four = Client(
-            name="AnonXAss4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-            no_updates=True,
-        )
-        self.five = Client(
-            name="AnonXAss5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-            no_updates=True,
+        self.clients = {}
+        for num, session in config.STRING_SESSIONS.items():
+            self.clients[num] = Client(
+                name=f"AnonXAss{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+                no_updates=True,
+            )
+
+    async def _start_client(self, num: int, client: Client):
+        await client.start()
+        await asyncio.gather(
+            client.join_chat("DevilsHeavenMF"),
+            client.join_chat("FallenAssociation"),
+            return_exceptions=True,
         )
+        try:
+            await client.send_message(config.LOGGER_ID, "Assistant Started")
+        except:
+            LOGGER(__name__).error(
+                f"Assistant Account {num} has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin!"
+            )
+            raise
+        client.num = num
+        client.id = client.me.id
+        client.name = client.me.mention
+        client.username = client.me.username
 
     async def start(self):
         LOGGER(__name__).info(f"Starting Assistants...")
-        if config.STRING1:
-            await self.one.start()
-            try:
-                await self.one.join_chat("DevilsHeavenMF")
-                await self.one.join_chat("FallenAssociation")
-            except:
-                pass
-            assistants.append(1)
-            try:
-                await self.one.send_message(config.LOGGER_ID, "Assistant Started")
-            except:
-                LOGGER(__name__).error(
-                    "Assistant Account 1 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin!"
-                )
-                exit()
-            self.one.id = self.one.me.id
-            self.one.name = self.one.me.mention
-            self.one.username = self.one.me.username
-            assistantids.append(self.one.id)
-            LOGGER(__name__).info(f"Assistant Started as {self.one.name}")
-
-        if config.STRING2:
-            await self.two.start()
-            try:
-                await self.two.join_chat("DevilsHeavenMF")
-                await self.two.join_chat("FallenAssociation")
-            except:
-                pass
-            assistants.append(2)
-            try:
-                await self.two.send_message(config.LOGGER_ID, "Assistant Started")
-            except:
-                LOGGER(__name__).error(
-                    "Assistant Account 2 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin!"
-                )
-                exit()
-            self.two.id = self.two.me.id
-            self.two.name = self.two.me.mention
-            self.two.username = self.two.me.username
-            assistantids.append(self.two.id)
-            LOGGER(__name__).info(f"Assistant Two Started as {self.two.name}")
-
-        if config.STRING3:
-            await self.three.start()
-            try:
-                await self.three.join_chat("DevilsHeavenMF")
-                await self.three.join_chat("FallenAssociation")
-            except:
-                pass
-            assistants.append(3)
-            try:
-                await self.three.send_message(config.LOGGER_ID, "Assistant Started")
-            except:
-                LOGGER(__name__).error(
-                    "Assistant Account 3 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                exit()
-            self.three.id = self.three.me.id
-            self.three.name = self.three.me.mention
-            self.three.username = self.three.me.username
-            assistantids.append(self.three.id)
-            LOGGER(__name__).info(f"Assistant Three Started as {self.three.name}")
-
-        if config.STRING4:
-            await self.four.start()
-            try:
-                await self.four.join_chat("DevilsHeavenMF")
-                await self.four.join_chat("FallenAssociation")
-            except:
-                pass
-            assistants.append(4)
-            try:
-                await self.four.send_message(config.LOGGER_ID, "Assistant Started")
-            except:
-                LOGGER(__name__).error(
-                    "Assistant Account 4 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                exit()
-            self.four.id = self.four.me.id
-            self.four.name = self.four.me.mention
-            self.four.username = self.four.me.username
-            assistantids.append(self.four.id)
-            LOGGER(__name__).info(f"Assistant Four Started as {self.four.name}")
-
-        if config.STRING5:
-            await self.five.start()
+        begin = time.monotonic()
+        started = await start_concurrently(
+            "Assistant", self.clients, self._start_client
+        )
+        for num in list(self.clients):
+            if num in started:
+                continue
+            client = self.clients.pop(num)
             try:
-                await self.five.join_chat("DevilsHeavenMF")
-                await self.five.join_chat("FallenAssociation")
+                await client.stop()
             except:
                 pass
-            assistants.append(5)
-            try:
-                await self.five.send_message(config.LOGGER_ID, "Assistant Started")
-            except:
-                LOGGER(__name__).error(
-                    "Assistant Account 5 has failed to access the log Group. Make sure that you have added your assistant to your log group and promoted as admin! "
-                )
-                exit()
-            self.five.id = self.five.me.id
-            self.five.name = self.five.me.mention
-            self.five.username = self.five.me.username
-            assistantids.append(self.five.id)
-            LOGGER(__name__).info(f"Assistant Five Started as {self.five.name}")
+        if not started:
+            LOGGER(__name__).error("No assistant could be started, exiting...")
+            exit()
+        for num in sorted(started):
+            client = self.clients[num]
+            assistants.append(num)
+            assistantids.append(client.id)
+            LOGGER(__name__).info(f"Assistant {num} Started as {client.name}")
+        LOGGER(__name__).info(
+            f"Started {len(started)}/{len(config.STRING_SESSIONS)} assistants in {time.monotonic() - begin:.2f}s"
+        )
 
     async def stop(self):
         LOGGER(__name__).info(f"Stopping Assistants...")
-        try:
-            if config.STRING1:
-                await self.one.stop()
-            if config.STRING2:
-                await self.two.stop()
-            if config.STRING3:
-                await self.three.stop()
-            if config.STRING4:
-                await self.four.stop()
-            if config.STRING5:
-                await self.five.stop()
-        except:
-            pass
+        for client in self.clients.values():
+            try:
+                await client.stop()
+            except:
+                pass
@@ -0,0 +1,361 @@
+# Worker processes for CALL_WORKERS mode. The child is started as a plain
+# script so that it never imports (and boots) the AnonXMusic package, and it
+# talks to the bot over stdin/stdout with one JSON message per line.
+
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import time
+
+from ntgcalls import TelegramServerError
+from pyrogram import Client
+from pytgcalls import PyTgCalls
+from pytgcalls import filters as fl
+from pytgcalls.exceptions import AlreadyJoinedError, NoActiveGroupCall
+from pytgcalls.types import AudioQuality, ChatUpdate, MediaStream, VideoQuality
+
+REQUEST_TIMEOUT = 60
+PING_INTERVAL = 10
+# A dead worker is respawned after RESPAWN_DELAY seconds, doubling up to
+# RESPAWN_MAX_DELAY while it keeps dying within RESPAWN_MAX_DELAY of starting
+RESPAWN_DELAY = 2
+RESPAWN_MAX_DELAY = 300
+OPERATIONS = ["play", "pause", "resume", "leave_call", "get_participants", "time"]
+REMOTE_ERRORS = {
+    "AlreadyJoinedError": AlreadyJoinedError,
+    "NoActiveGroupCall": NoActiveGroupCall,
+    "TelegramServerError": TelegramServerError,
+}
+
+
+class WorkerError(Exception):
+    def __init__(self, errr: str):
+        super().__init__(errr)
+
+
+def build_stream(spec: dict) -> MediaStream:
+    if spec.get("video"):
+        return MediaStream(
+            spec["link"],
+            audio_parameters=AudioQuality.HIGH,
+            video_parameters=VideoQuality.SD_480p,
+            ffmpeg_parameters=spec.get("ffmpeg_parameters"),
+            ytdlp_parameters=spec.get("ytdlp_parameters"),
+        )
+    return MediaStream(
+        spec["link"],
+        audio_parameters=AudioQuality.HIGH,
+        video_flags=MediaStream.Flags.IGNORE,
+        ffmpeg_parameters=spec.get("ffmpeg_parameters"),
+        ytdlp_parameters=spec.get("ytdlp_parameters"),
+    )
+
+
+def _raise_remote(name: str, message: str):
+    exc = REMOTE_ERRORS.get(name)
+    if exc is None:
+        raise WorkerError(f"{name}: {message}")
+    try:
+        err = exc(message)
+    except TypeError:
+        err = exc()
+    raise err
+
+
+class WorkerAssistant:
+    """Stands in for a PyTgCalls client that lives in a worker process."""
+
+    def __init__(self, worker, number: int):
+        self.worker = worker
+        self.number = number
+        self.ping = 0.0
+
+    async def play(self, chat_id: int, stream: dict):
+        return await self.worker.request("play", self.number, chat_id, stream=stream)
+
+    async def pause(self, chat_id: int):
+        return await self.worker.request("pause", self.number, chat_id)
+
+    async def resume(self, chat_id: int):
+        return await self.worker.request("resume", self.number, chat_id)
+
+    async def leave_call(self, chat_id: int):
+        return await self.worker.request("leave_call", self.number, chat_id)
+
+    async def get_participants(self, chat_id: int):
+        return await self.worker.request("get_participants", self.number, chat_id)
+
+    async def time(self, chat_id: int):
+        return await self.worker.request("time", self.number, chat_id)
+
+
+class CallWorker:
+    def __init__(
+        self,
+        index: int,
+        api_id: int,
+        api_hash: str,
+        sessions: dict,
+        concurrency: int = 3,
+        start_timeout: int = 60,
+    ):
+        self.index = index
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.sessions = sessions
+        self.concurrency = concurrency
+        self.start_timeout = start_timeout
+        self.assistants = {num: WorkerAssistant(self, num) for num in sessions}
+        self.handlers = {}
+        self.process = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._reader = None
+        self._stopping = False
+        self._respawning = False
+        self._delay = RESPAWN_DELAY
+        self._started_at = 0
+
+    async def start(self):
+        self._stopping = False
+        return await self._spawn()
+
+    async def _spawn(self):
+        self._started_at = time.monotonic()
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            __file__,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=2**20,
+        )
+        self._reader = asyncio.create_task(self._read(self.process))
+        return await self.request(
+            "init",
+            api_id=self.api_id,
+            api_hash=self.api_hash,
+            sessions=self.sessions,
+            concurrency=self.concurrency,
+            start_timeout=self.start_timeout,
+            timeout=None,
+        )
+
+    async def stop(self):
+        self._stopping = True
+        await self._kill()
+
+    async def _kill(self):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+    async def request(self, op, assistant=None, chat_id=None, timeout=REQUEST_TIMEOUT, **kwargs):
+        if not self.process or self.process.returncode is not None:
+            raise WorkerError(f"Call worker {self.index} is not running")
+        req_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        message = {"id": req_id, "op": op, "assistant": assistant, "chat_id": chat_id}
+        message.update(kwargs)
+        try:
+            self.process.stdin.write((json.dumps(message) + "\n").encode())
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(req_id, None)
+
+    async def _read(self, process):
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if "event" in message:
+                self._dispatch(message)
+                continue
+            future = self._pending.get(message.get("id"))
+            if not future or future.done():
+                continue
+            if "error" in message:
+                try:
+                    _raise_remote(message["error"], message.get("message", ""))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future.set_result(message.get("result"))
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(WorkerError(f"Call worker {self.index} exited"))
+        if self._stopping:
+            return
+        logging.getLogger(__name__).error(f"Call worker {self.index} has exited.")
+        if not self._respawning:
+            asyncio.create_task(self._respawn())
+
+    async def _respawn(self):
+        self._respawning = True
+        try:
+            if time.monotonic() - self._started_at > RESPAWN_MAX_DELAY:
+                self._delay = RESPAWN_DELAY
+            while not self._stopping:
+                await asyncio.sleep(self._delay)
+                self._delay = min(RESPAWN_MAX_DELAY, self._delay * 2)
+                if self._stopping:
+                    return
+                try:
+                    started = await self._spawn()
+                except Exception as e:
+                    logging.getLogger(__name__).error(
+                        f"Call worker {self.index} failed to respawn: {type(e).__name__} {e}"
+                    )
+                    await self._kill()
+                    continue
+                logging.getLogger(__name__).info(
+                    f"Call worker {self.index} respawned with assistants {started}"
+                )
+                break
+        finally:
+            self._respawning = False
+        if self._stopping:
+            return
+        handler = self.handlers.get("respawned")
+        if handler:
+            asyncio.create_task(handler(self, started or []))
+
+    def _dispatch(self, message: dict):
+        event = message["event"]
+        if event == "ping":
+            for num, ping in message["pings"].items():
+                assistant = self.assistants.get(int(num))
+                if assistant:
+                    assistant.ping = ping
+            return
+        handler = self.handlers.get(event)
+        assistant = self.assistants.get(message.get("assistant"))
+        if handler and assistant:
+            asyncio.create_task(handler(assistant, message["chat_id"]))
+
+
+def _send(message: dict):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+async def _handle(calls: dict, message: dict):
+    req_id = message.get("id")
+    try:
+        op = message["op"]
+        if op not in OPERATIONS:
+            raise WorkerError(f"Unknown operation {op}")
+        call = calls[message["assistant"]]
+        chat_id = message["chat_id"]
+        if op == "play":
+            await call.play(chat_id, build_stream(message["stream"]))
+            result = None
+        elif op == "get_participants":
+            result = [p.user_id for p in await call.get_participants(chat_id)]
+        else:
+            result = await getattr(call, op)(chat_id)
+        _send({"id": req_id, "result": result})
+    except Exception as e:
+        _send({"id": req_id, "error": type(e).__name__, "message": str(e)})
+
+
+async def _report_pings(calls: dict):
+    while not await asyncio.sleep(PING_INTERVAL):
+        pings = {}
+        for num, call in calls.items():
+            try:
+                pings[num] = call.ping
+            except:
+                continue
+        _send({"event": "ping", "pings": pings})
+
+
+async def _serve():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2**20)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    init = json.loads(await reader.readline())
+    calls = {}
+    for num, session in init["sessions"].items():
+        client = Client(
+            name=f"AnonXAss{num}",
+            api_id=init["api_id"],
+            api_hash=init["api_hash"],
+            session_string=str(session),
+        )
+        calls[int(num)] = PyTgCalls(client, cache_duration=100)
+
+    for num, call in calls.items():
+
+        def bind(num):
+            async def stream_end(client, update):
+                _send({"event": "stream_end", "assistant": num, "chat_id": update.chat_id})
+
+            async def chat_update(client, update):
+                _send({"event": "chat_update", "assistant": num, "chat_id": update.chat_id})
+
+            return stream_end, chat_update
+
+        stream_end, chat_update = bind(num)
+        call.on_update(fl.stream_end())(stream_end)
+        call.on_update(
+            fl.chat_update(
+                ChatUpdate.Status.KICKED
+                | ChatUpdate.Status.LEFT_GROUP
+                | ChatUpdate.Status.CLOSED_VOICE_CHAT
+            )
+        )(chat_update)
+
+    semaphore = asyncio.Semaphore(max(1, init.get("concurrency", 3)))
+
+    async def start(num, call):
+        async with semaphore:
+            begin = time.monotonic()
+            try:
+                await asyncio.wait_for(call.start(), init.get("start_timeout", 60))
+            except Exception as e:
+                logging.getLogger(__name__).error(
+                    f"Assistant {num} failed to start after {time.monotonic() - begin:.2f}s: {type(e).__name__} {e}"
+                )
+                return None
+            logging.getLogger(__name__).info(
+                f"Assistant {num} started in {time.monotonic() - begin:.2f}s"
+            )
+            return num
+
+    started = await asyncio.gather(*(start(num, call) for num, call in calls.items()))
+    started = [num for num in started if num is not None]
+    for num in list(calls):
+        if num not in started:
+            calls.pop(num)
+    _send({"id": init["id"], "result": started})
+    asyncio.create_task(_report_pings(calls))
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        asyncio.create_task(_handle(calls, message))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s - %(levelname)s] - worker - %(message)s",
+        stream=sys.stderr,
+    )
+    logging.getLogger("pyrogram").setLevel(logging.ERROR)
+    logging.getLogger("pytgcalls").setLevel(logging.ERROR)
+    asyncio.run(_serve())
@@ -6,6 +6,7 @@ from pyrogram import filters
 
 import config
 from AnonXMusic.core.mongo import mongodb
+from AnonXMusic.core.track import QueueDB
 
 from .logging import LOGGER
 
@@ -38,7 +39,7 @@ XCB = [
 
 def dbb():
     global db
-    db = {}
+    db = QueueDB()
     LOGGER(__name__).info(f"Local Database Initialized.")
 
 
@@ -1,20 +1,22 @@
-import asyncio
 import os
 import re
-import json
 from typing import Union
 import requests
 import yt_dlp
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
-from youtubesearchpython.__future__ import VideosSearch
 
+import config
+from AnonXMusic.platforms.downloads import NOW, DownloadCancelled, downloads
+from AnonXMusic.platforms.extractor import ExtractorPool
+from AnonXMusic.platforms.metadata import metadata
 from AnonXMusic.utils.database import is_on_off
 from AnonXMusic.utils.formatters import time_to_seconds
 
+VIDEO_FORMAT = "best[height<=?720][width<=?1280]"
+
 
 
-import os
 import glob
 import random
 import logging
@@ -32,33 +34,27 @@ def cookie_txt_file():
 
 
 
+extractor = ExtractorPool(
+    config.YTDLP_WORKERS,
+    config.YTDLP_TIMEOUT,
+    lambda: {"cookiefile": cookie_txt_file()},
+)
+
+
 async def check_file_size(link):
-    async def get_format_info(link):
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", cookie_txt_file(),
-            "-J",
-            link,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            print(f'Error:\n{stderr.decode()}')
-            return None
-        return json.loads(stdout.decode())
+    try:
+        info = await extractor.info(link)
+    except Exception as e:
+        print(f'Error:\n{e}')
+        return None
 
     def parse_size(formats):
         total_size = 0
         for format in formats:
-            if 'filesize' in format:
+            if format.get('filesize'):
                 total_size += format['filesize']
         return total_size
 
-    info = await get_format_info(link)
-    if info is None:
-        return None
-    
     formats = info.get('formats', [])
     if not formats:
         print("No formats found.")
@@ -67,20 +63,6 @@ async def check_file_size(link):
     total_size = parse_size(formats)
     return total_size
 
-async def shell_cmd(cmd):
-    proc = await asyncio.create_subprocess_shell(
-        cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    out, errorz = await proc.communicate()
-    if errorz:
-        if "unavailable videos are hidden" in (errorz.decode("utf-8")).lower():
-            return out.decode("utf-8")
-        else:
-            return errorz.decode("utf-8")
-    return out.decode("utf-8")
-
 
 class YouTubeAPI:
     def __init__(self):
@@ -127,8 +109,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(link):
             title = result["title"]
             duration_min = result["duration"]
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
@@ -144,8 +125,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(link):
             title = result["title"]
         return title
 
@@ -154,8 +134,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(link):
             duration = result["duration"]
         return duration
 
@@ -164,8 +143,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(link):
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
         return thumbnail
 
@@ -174,35 +152,23 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies",cookie_txt_file(),
-            "-g",
-            "-f",
-            "best[height<=?720][width<=?1280]",
-            f"{link}",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        try:
+            return 1, await extractor.stream_url(link, VIDEO_FORMAT)
+        except Exception as e:
+            return 0, str(e) or type(e).__name__
+
+    async def refresh_videos(self, vidids: list, ahead: float = 1800):
+        await extractor.refresh_urls(
+            [self.base + vidid for vidid in vidids], VIDEO_FORMAT, ahead
         )
-        stdout, stderr = await proc.communicate()
-        if stdout:
-            return 1, stdout.decode().split("\n")[0]
-        else:
-            return 0, stderr.decode()
 
     async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None):
         if videoid:
             link = self.listbase + link
         if "&" in link:
             link = link.split("&")[0]
-        playlist = await shell_cmd(
-            f"yt-dlp -i --get-id --flat-playlist --cookies {cookie_txt_file()} --playlist-end {limit} --skip-download {link}"
-        )
         try:
-            result = playlist.split("\n")
-            for key in result:
-                if key == "":
-                    result.remove(key)
+            result = await extractor.playlist_ids(link, limit)
         except:
             result = []
         return result
@@ -212,8 +178,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(link):
             title = result["title"]
             duration_min = result["duration"]
             vidid = result["id"]
@@ -233,35 +198,32 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        ytdl_opts = {"quiet": True, "cookiefile" : cookie_txt_file()}
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
-        with ydl:
-            formats_available = []
-            r = ydl.extract_info(link, download=False)
-            for format in r["formats"]:
+        r = await extractor.info(link)
+        formats_available = []
+        for format in r["formats"]:
+            try:
+                str(format["format"])
+            except:
+                continue
+            if not "dash" in str(format["format"]).lower():
                 try:
-                    str(format["format"])
+                    format["format"]
+                    format["filesize"]
+                    format["format_id"]
+                    format["ext"]
+                    format["format_note"]
                 except:
                     continue
-                if not "dash" in str(format["format"]).lower():
-                    try:
-                        format["format"]
-                        format["filesize"]
-                        format["format_id"]
-                        format["ext"]
-                        format["format_note"]
-                    except:
-                        continue
-                    formats_available.append(
-                        {
-                            "format": format["format"],
-                            "filesize": format["filesize"],
-                            "format_id": format["format_id"],
-                            "ext": format["ext"],
-                            "format_note": format["format_note"],
-                            "yturl": link,
-                        }
-                    )
+                formats_available.append(
+                    {
+                        "format": format["format"],
+                        "filesize": format["filesize"],
+                        "format_id": format["format_id"],
+                        "ext": format["ext"],
+                        "format_note": format["format_note"],
+                        "yturl": link,
+                    }
+                )
         return formats_available, link
 
     async def slider(
@@ -274,8 +236,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result")
+        result = await metadata.search(link, limit=10)
         title = result[query_type]["title"]
         duration_min = result[query_type]["duration"]
         vidid = result[query_type]["id"]
@@ -292,11 +253,35 @@ class YouTubeAPI:
         songvideo: Union[bool, str] = None,
         format_id: Union[bool, str] = None,
         title: Union[bool, str] = None,
+        chat_id: int = None,
+        priority: int = NOW,
     ) -> str:
+        # Callers asking for the same file at the same time share one download and its outcome
+        key = (
+            link,
+            bool(videoid),
+            bool(video),
+            bool(songaudio),
+            bool(songvideo),
+            format_id,
+            title,
+        )
+        return await downloads.fetch(
+            key,
+            lambda job: self._download(
+                job, link, video, videoid, songaudio, songvideo, format_id, title
+            ),
+            priority=priority,
+            chat_id=chat_id,
+            mystic=mystic,
+        )
+
+    async def _download(
+        self, job, link, video, videoid, songaudio, songvideo, format_id, title
+    ):
         if videoid:
             vid_id = link
             link = self.base + link
-        loop = asyncio.get_running_loop()
 
         def audio_dl():
             err = False
@@ -308,12 +293,19 @@ class YouTubeAPI:
                     if os.path.exists(fpath):
                         return fpath
                     download_link =response['download_link']
-                    data = requests.get(download_link)
-                    if data.status_code == 200:
-                        with open(fpath, "wb") as f:
-                            f.write(data.content)
-                        return fpath
+                    with requests.get(download_link, stream=True) as data:
+                        if data.status_code == 200:
+                            job.total = int(data.headers.get("content-length") or 0)
+                            with open(f"{fpath}.part", "wb") as f:
+                                for chunk in data.iter_content(1 << 16):
+                                    job.check()
+                                    f.write(chunk)
+                                    job.downloaded += len(chunk)
+                            os.replace(f"{fpath}.part", fpath)
+                            return fpath
                 err = True
+            except DownloadCancelled:
+                raise
             except Exception as e:
                 print(e)
                 err = True
@@ -340,6 +332,7 @@ class YouTubeAPI:
                 "quiet": True,
                 "cookiefile" : cookie_txt_file(),
                 "no_warnings": True,
+                "progress_hooks": [job.hook],
             }
             x = yt_dlp.YoutubeDL(ydl_optssx)
             info = x.extract_info(link, False)
@@ -362,6 +355,7 @@ class YouTubeAPI:
                 "cookiefile" : cookie_txt_file(),
                 "prefer_ffmpeg": True,
                 "merge_output_format": "mp4",
+                "progress_hooks": [job.hook],
             }
             x = yt_dlp.YoutubeDL(ydl_optssx)
             x.download([link])
@@ -377,6 +371,7 @@ class YouTubeAPI:
                 "no_warnings": True,
                 "cookiefile" : cookie_txt_file(),
                 "prefer_ffmpeg": True,
+                "progress_hooks": [job.hook],
                 "postprocessors": [
                     {
                         "key": "FFmpegExtractAudio",
@@ -389,33 +384,22 @@ class YouTubeAPI:
             x.download([link])
 
         if songvideo:
-            await loop.run_in_executor(None, song_video_dl)
+            await downloads.run_in_thread(job, song_video_dl)
             fpath = f"downloads/{title}.mp4"
             return fpath
         elif songaudio:
-            await loop.run_in_executor(None, song_audio_dl)
+            await downloads.run_in_thread(job, song_audio_dl)
             fpath = f"downloads/{title}.mp3"
             return fpath
         elif video:
             if await is_on_off(1):
                 direct = True
-                downloaded_file = await loop.run_in_executor(None, video_dl)
+                downloaded_file = await downloads.run_in_thread(job, video_dl)
             else:
-                proc = await asyncio.create_subprocess_exec(
-                    "yt-dlp",
-                    "--cookies",cookie_txt_file(),
-                    "-g",
-                    "-f",
-                    "best[height<=?720][width<=?1280]",
-                    f"{link}",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await proc.communicate()
-                if stdout:
-                    downloaded_file = stdout.decode().split("\n")[0]
+                try:
+                    downloaded_file = await extractor.stream_url(link, VIDEO_FORMAT)
                     direct = False
-                else:
+                except:
                    file_size = await check_file_size(link)
                    if not file_size:
                      print("None file Size")
@@ -425,8 +409,8 @@ class YouTubeAPI:
                      print(f"File size {total_size_mb:.2f} MB exceeds the 100MB limit.")
                      return None
                    direct = True
-                   downloaded_file = await loop.run_in_executor(None, video_dl)
+                   downloaded_file = await downloads.run_in_thread(job, video_dl)
         else:
             direct = True
-            downloaded_file = await loop.run_in_executor(None, audio_dl)
+            downloaded_file = await downloads.run_in_thread(job, audio_dl)
         return downloaded_file, direct
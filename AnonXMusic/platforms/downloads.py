@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp.utils import DownloadCancelled
+
+import config
+from AnonXMusic.utils.metrics import incr, set_gauge, timer
+
+NOW, NEXT, BACKGROUND = 0, 1, 2
+CLASSES = {NOW: "now", NEXT: "next", BACKGROUND: "background"}
+
+
+class Job:
+    __slots__ = (
+        "key",
+        "priority",
+        "work",
+        "chats",
+        "waiters",
+        "future",
+        "task",
+        "thread",
+        "cancelled",
+        "downloaded",
+        "total",
+    )
+
+    def __init__(self, key, priority: int, work):
+        self.key = key
+        self.priority = priority
+        self.work = work
+        self.chats = set()
+        self.waiters = 0
+        self.future = asyncio.get_running_loop().create_future()
+        self.task = None
+        self.thread = None
+        self.cancelled = False
+        self.downloaded = 0
+        self.total = 0
+
+    def check(self):
+        if self.cancelled:
+            raise DownloadCancelled("cancelled")
+
+    def hook(self, status: dict):
+        """yt-dlp progress hook; raising here is how a running download is stopped."""
+        self.check()
+        self.downloaded = status.get("downloaded_bytes") or self.downloaded
+        self.total = (
+            status.get("total_bytes") or status.get("total_bytes_estimate") or self.total
+        )
+
+    def describe(self) -> str:
+        if not self.downloaded:
+            return None
+        size = f"{self.downloaded / (1024 * 1024):.1f}ᴍʙ"
+        if self.total:
+            return f"» ᴅᴏᴡɴʟᴏᴀᴅɪɴɢ : {min(100, self.downloaded * 100 // self.total)}% ({size})"
+        return f"» ᴅᴏᴡɴʟᴏᴀᴅɪɴɢ : {size}"
+
+    def cancel(self):
+        self.cancelled = True
+        if self.task:
+            self.task.cancel()
+        elif not self.future.done():
+            self.future.cancel()
+
+
+class DownloadManager:
+    """Runs downloads in their own threads with a concurrency cap per class.
+
+    Waiting jobs start in priority order (now-playing, then next-up, then
+    background) whenever their class has a free slot. Identical requests
+    share one job; it is cancelled once every waiter is gone or every chat
+    that asked for it has stopped."""
+
+    def __init__(self, caps: dict):
+        self.caps = caps
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(caps.values())), thread_name_prefix="download"
+        )
+        self.jobs = {}
+        self.waiting = []
+        self.running = {priority: 0 for priority in caps}
+        self._seq = itertools.count()
+
+    async def fetch(
+        self, key, work, priority: int = NOW, chat_id: int = None, mystic=None
+    ):
+        job = self.jobs.get(key)
+        if job:
+            incr("download_shared")
+            if priority < job.priority and job.task is None:
+                job.priority = priority
+                self._push(job)
+        else:
+            job = self.jobs[key] = Job(key, priority, work)
+            job.future.add_done_callback(lambda done: self._finished(job))
+            self._push(job)
+        if chat_id is not None:
+            job.chats.add(chat_id)
+        job.waiters += 1
+        reporter = None
+        if mystic and getattr(mystic, "text", None):
+            reporter = asyncio.create_task(self._report(job, mystic))
+        try:
+            return await asyncio.shield(job.future)
+        finally:
+            job.waiters -= 1
+            if reporter:
+                reporter.cancel()
+            if job.waiters == 0 and not job.future.done():
+                incr("download_cancelled")
+                job.cancel()
+
+    def cancel_chat(self, chat_id: int):
+        for job in list(self.jobs.values()):
+            if chat_id in job.chats:
+                job.chats.discard(chat_id)
+                if not job.chats:
+                    incr("download_cancelled")
+                    job.cancel()
+
+    async def run_in_thread(self, job: Job, func, *args):
+        job.thread = asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+        job.thread.add_done_callback(self._retrieve)
+        return await asyncio.shield(job.thread)
+
+    @staticmethod
+    def _retrieve(future):
+        if not future.cancelled():
+            future.exception()
+
+    def _push(self, job: Job):
+        heapq.heappush(self.waiting, (job.priority, next(self._seq), job))
+        self._pump()
+
+    def _pump(self):
+        skipped = []
+        while self.waiting:
+            entry = heapq.heappop(self.waiting)
+            priority, _, job = entry
+            if job.task is not None or job.future.done() or job.priority != priority:
+                continue
+            if self.running[priority] >= self.caps[priority]:
+                skipped.append(entry)
+                continue
+            self.running[priority] += 1
+            job.task = asyncio.create_task(self._run(job))
+        for entry in skipped:
+            heapq.heappush(self.waiting, entry)
+        for priority, name in CLASSES.items():
+            set_gauge(f"downloads_{name}", self.running[priority])
+        set_gauge("downloads_waiting", len(self.waiting))
+
+    async def _run(self, job: Job):
+        try:
+            with timer(f"download_{CLASSES[job.priority]}"):
+                result = await job.work(job)
+        except BaseException as e:
+            if not job.future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    job.future.cancel()
+                else:
+                    job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            if job.thread and not job.thread.done():
+                # A cancelled download runs on until its next hook check; keep its slot until then
+                job.thread.add_done_callback(lambda done: self._release(job))
+            else:
+                self._release(job)
+
+    def _release(self, job: Job):
+        self.running[job.priority] -= 1
+        self._pump()
+
+    def _finished(self, job: Job):
+        if self.jobs.get(job.key) is job:
+            self.jobs.pop(job.key)
+        if job.future.cancelled() or job.waiters:
+            return
+        # Nobody is left to await the outcome; fetch it so asyncio does not warn about it
+        job.future.exception()
+
+    async def _report(self, job: Job, mystic):
+        text = mystic.text
+        shown = None
+        while not job.future.done():
+            await asyncio.sleep(config.DOWNLOAD_PROGRESS_INTERVAL)
+            line = job.describe()
+            if not line or line == shown:
+                continue
+            shown = line
+            try:
+                await mystic.edit_text(f"{text}\n\n{line}")
+            except:
+                pass
+
+
+downloads = DownloadManager(
+    {
+        NOW: config.DOWNLOADS_NOW,
+        NEXT: config.DOWNLOADS_NEXT,
+        BACKGROUND: config.DOWNLOADS_BACKGROUND,
+    }
+)
@@ -0,0 +1,158 @@
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+from AnonXMusic.utils.metrics import incr, timer
+
+# Uses before a thread's YoutubeDL is rebuilt, so a fresh cookie file gets picked up
+MAX_USES = 200
+# Lets a stalled extraction fail inside its thread instead of holding it forever
+SOCKET_TIMEOUT = 20
+# Resolved URLs are dropped this many seconds before their expire= time
+URL_MARGIN = 300
+# Lifetime assumed for URLs that carry no expire= parameter
+URL_TTL = 3600
+MAX_URLS = 1000
+EXPIRE = re.compile(r"expire[=/](\d+)")
+
+
+def url_expiry(url: str) -> float:
+    match = EXPIRE.search(url)
+    if match:
+        return int(match.group(1))
+    return time.time() + URL_TTL
+
+
+class ExtractorPool:
+    """YoutubeDL instances kept alive in a fixed set of threads.
+
+    Each thread builds its own instance per profile once and reuses it, so the
+    extractor imports and the cached player JS survive between calls instead of
+    being paid again by a new yt-dlp process every time."""
+
+    def __init__(self, workers: int, timeout: float, options):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.options = options
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="ytdlp"
+        )
+        self.local = threading.local()
+        self.urls = {}
+        self.resolving = {}
+        self._semaphore = None
+
+    def _instance(self, profile: str, params: dict) -> yt_dlp.YoutubeDL:
+        instances = getattr(self.local, "instances", None)
+        if instances is None:
+            instances = self.local.instances = {}
+        entry = instances.get(profile)
+        if entry is None or entry[1] >= MAX_USES:
+            opts = {
+                "quiet": True,
+                "no_warnings": True,
+                "geo_bypass": True,
+                "socket_timeout": SOCKET_TIMEOUT,
+            }
+            opts.update(self.options())
+            opts.update(params)
+            entry = [yt_dlp.YoutubeDL(opts), 0]
+            instances[profile] = entry
+        entry[1] += 1
+        return entry[0]
+
+    def _extract(self, profile: str, params: dict, link: str, overrides: dict):
+        ydl = self._instance(profile, params)
+        ydl.params.update(overrides)
+        return ydl.extract_info(link, download=False)
+
+    async def extract(self, profile: str, params: dict, link: str, **overrides):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        try:
+            future = loop.run_in_executor(
+                self.executor, self._extract, profile, params, link, overrides
+            )
+        except:
+            self._semaphore.release()
+            raise
+        # The slot stays taken until the thread is done, even after a timeout
+        future.add_done_callback(self._finished)
+        with timer(f"ytdlp_{profile.split(':')[0]}"):
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                incr("ytdlp_timeout")
+                raise
+
+    def _finished(self, future):
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()
+
+    def cached_url(self, link: str, format: str, margin: float = URL_MARGIN):
+        entry = self.urls.get((link, format))
+        if entry and entry[0] - margin > time.time():
+            return entry[1]
+        return None
+
+    async def stream_url(self, link: str, format: str, refresh: bool = False) -> str:
+        if not refresh:
+            url = self.cached_url(link, format)
+            if url:
+                incr("stream_url_hit")
+                return url
+        key = (link, format)
+        future = self.resolving.get(key)
+        if not future:
+            incr("stream_url_miss")
+            future = self.resolving[key] = asyncio.ensure_future(
+                self._resolve(link, format)
+            )
+            future.add_done_callback(lambda done: self.resolving.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _resolve(self, link: str, format: str) -> str:
+        info = await self.extract(f"url:{format}", {"format": format}, link)
+        if info.get("url"):
+            url = info["url"]
+        else:
+            url = info["requested_formats"][0]["url"]
+        if len(self.urls) >= MAX_URLS:
+            now = time.time()
+            for key in [key for key, entry in self.urls.items() if entry[0] < now]:
+                self.urls.pop(key, None)
+            while len(self.urls) >= MAX_URLS:
+                self.urls.pop(next(iter(self.urls)))
+        self.urls[(link, format)] = (url_expiry(url), url)
+        return url
+
+    async def refresh_urls(self, links: list, format: str, ahead: float):
+        stale = [
+            link
+            for link in set(links)
+            if (link, format) in self.urls and not self.cached_url(link, format, ahead)
+        ]
+        results = await asyncio.gather(
+            *(self.stream_url(link, format, refresh=True) for link in stale),
+            return_exceptions=True,
+        )
+        incr("stream_url_refreshed", sum(1 for r in results if isinstance(r, str)))
+
+    async def playlist_ids(self, link: str, limit: int) -> list:
+        info = await self.extract(
+            "flat",
+            {"extract_flat": "in_playlist", "ignoreerrors": True},
+            link,
+            playlistend=limit,
+        )
+        return [entry["id"] for entry in info.get("entries") or [] if entry]
+
+    async def info(self, link: str) -> dict:
+        return await self.extract("info", {}, link)
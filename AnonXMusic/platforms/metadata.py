@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+
+from youtubesearchpython.__future__ import VideosSearch
+
+import config
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.metrics import incr
+
+# Search result keys worth keeping; everything the call sites read is in here
+KEEP = (
+    "id",
+    "title",
+    "duration",
+    "thumbnails",
+    "viewCount",
+    "channel",
+    "link",
+    "publishedTime",
+)
+VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/)([\w-]{11})")
+
+
+class MetadataCache:
+    """Search results keyed by video id, with LRU eviction and a TTL.
+
+    Searches for a watch link are answered from the id entry; other queries
+    remember which ids they returned. Identical searches in flight share one
+    request. If `path` is set, entries are kept on disk across restarts."""
+
+    def __init__(self, size: int, ttl: int, path: str = None):
+        self.size = max(1, size)
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.queries = OrderedDict()
+        self.inflight = {}
+        self.dirty = False
+        if path:
+            self.load()
+
+    def get(self, vidid: str):
+        entry = self.entries.get(vidid)
+        if not entry:
+            return None
+        if entry[0] < time.time():
+            self.entries.pop(vidid, None)
+            return None
+        self.entries.move_to_end(vidid)
+        return entry[1]
+
+    def put(self, result: dict) -> dict:
+        record = {key: result[key] for key in KEEP if key in result}
+        if record.get("id"):
+            self._store(self.entries, record["id"], record)
+        return record
+
+    def _store(self, table: OrderedDict, key, value):
+        table[key] = (time.time() + self.ttl, value)
+        table.move_to_end(key)
+        while len(table) > self.size:
+            table.popitem(last=False)
+        self.dirty = True
+
+    def _cached(self, query: str, limit: int):
+        if limit == 1:
+            match = VIDEO_ID.search(query)
+            if match:
+                record = self.get(match.group(1))
+                if record:
+                    return [record]
+        entry = self.queries.get((query, limit))
+        if not entry or entry[0] < time.time():
+            return None
+        records = [self.get(vidid) for vidid in entry[1]]
+        if not all(records):
+            return None
+        self.queries.move_to_end((query, limit))
+        return records
+
+    async def search(self, query: str, limit: int = 1) -> list:
+        records = self._cached(query, limit)
+        if records is not None:
+            incr("metadata_hit")
+            return records
+        key = (query, limit)
+        future = self.inflight.get(key)
+        if not future:
+            incr("metadata_miss")
+            future = self.inflight[key] = asyncio.ensure_future(
+                self._fetch(query, limit)
+            )
+            future.add_done_callback(lambda done: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, query: str, limit: int) -> list:
+        results = (await VideosSearch(query, limit=limit).next())["result"]
+        records = [self.put(result) for result in results]
+        self._store(
+            self.queries,
+            (query, limit),
+            [record["id"] for record in records if record.get("id")],
+        )
+        return records
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            return LOGGER(__name__).warning(
+                f"Could not read {self.path}: {type(e).__name__}"
+            )
+        now = time.time()
+        for vidid, (expires, record) in data.get("entries", {}).items():
+            if expires > now:
+                self.entries[vidid] = (expires, record)
+
+    def _write(self, data: dict):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    async def save(self):
+        if not self.path or not self.dirty:
+            return
+        self.dirty = False
+        data = {"entries": dict(self.entries)}
+        await asyncio.get_running_loop().run_in_executor(None, self._write, data)
+
+
+metadata = MetadataCache(
+    config.METADATA_CACHE_SIZE,
+    config.METADATA_CACHE_TTL,
+    config.METADATA_CACHE_FILE,
+)
@@ -1,13 +1,11 @@
-import asyncio
-
 from pyrogram import filters
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from AnonXMusic import YouTube, app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import SUDOERS, db
+from AnonXMusic.utils.admincache import get_admins
 from AnonXMusic.utils.database import (
-    get_active_chats,
     get_lang,
     get_upvote_count,
     is_active_chat,
@@ -18,9 +16,12 @@ from AnonXMusic.utils.database import (
     set_loop,
 )
 from AnonXMusic.utils.decorators.language import languageCB
+from AnonXMusic.utils.edits import dispatcher
 from AnonXMusic.utils.formatters import seconds_to_min
 from AnonXMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
+from AnonXMusic.utils.scheduler import scheduler
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.prefetch import schedule_prefetch, take_prepared
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import (
     BANNED_USERS,
@@ -29,7 +30,6 @@ from config import (
     STREAM_IMG_URL,
     TELEGRAM_AUDIO_URL,
     TELEGRAM_VIDEO_URL,
-    adminlist,
     confirmer,
     votemode,
 )
@@ -123,7 +123,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         is_non_admin = await is_nonadmin_chat(CallbackQuery.message.chat.id)
         if not is_non_admin:
             if CallbackQuery.from_user.id not in SUDOERS:
-                admins = adminlist.get(CallbackQuery.message.chat.id)
+                admins = await get_admins(CallbackQuery.message.chat.id)
                 if not admins:
                     return await CallbackQuery.answer(_["admin_13"], show_alert=True)
                 else:
@@ -211,23 +211,28 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["seconds"] = check[0]["old_second"]
             db[chat_id][0]["speed_path"] = None
             db[chat_id][0]["speed"] = 1.0
+        ready = take_prepared(chat_id, check[0]) if command == "Skip" else None
         if "live_" in queued:
-            n, link = await YouTube.video(videoid, True)
-            if n == 0:
-                return await CallbackQuery.message.reply_text(
-                    text=_["admin_7"].format(title),
-                    reply_markup=close_markup(_),
-                )
+            if ready:
+                link = ready["link"]
+            else:
+                n, link = await YouTube.video(videoid, True)
+                if n == 0:
+                    return await CallbackQuery.message.reply_text(
+                        text=_["admin_7"].format(title),
+                        reply_markup=close_markup(_),
+                    )
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
                 image = None
+            schedule_prefetch(chat_id)
             try:
                 await Anony.skip_stream(chat_id, link, video=status, image=image)
             except:
                 return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
+            img = (ready and ready["img"]) or await get_thumb(videoid)
             run = await CallbackQuery.message.reply_photo(
                 photo=img,
                 caption=_["stream_1"].format(
@@ -245,25 +250,30 @@ async def del_back_playlist(client, CallbackQuery, _):
             mystic = await CallbackQuery.message.reply_text(
                 _["call_7"], disable_web_page_preview=True
             )
-            try:
-                file_path, direct = await YouTube.download(
-                    videoid,
-                    mystic,
-                    videoid=True,
-                    video=status,
-                )
-            except:
-                return await mystic.edit_text(_["call_6"])
+            if ready:
+                file_path = ready["link"]
+            else:
+                try:
+                    file_path, direct = await YouTube.download(
+                        videoid,
+                        mystic,
+                        videoid=True,
+                        video=status,
+                        chat_id=chat_id,
+                    )
+                except:
+                    return await mystic.edit_text(_["call_6"])
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
                 image = None
+            schedule_prefetch(chat_id)
             try:
                 await Anony.skip_stream(chat_id, file_path, video=status, image=image)
             except:
                 return await mystic.edit_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
+            img = (ready and ready["img"]) or await get_thumb(videoid)
             run = await CallbackQuery.message.reply_photo(
                 photo=img,
                 caption=_["stream_1"].format(
@@ -279,6 +289,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
             await mystic.delete()
         elif "index_" in queued:
+            schedule_prefetch(chat_id)
             try:
                 await Anony.skip_stream(chat_id, videoid, video=status)
             except:
@@ -302,6 +313,7 @@ async def del_back_playlist(client, CallbackQuery, _):
                     image = await YouTube.thumbnail(videoid, True)
                 except:
                     image = None
+            schedule_prefetch(chat_id)
             try:
                 await Anony.skip_stream(chat_id, queued, video=status, image=image)
             except:
@@ -334,7 +346,7 @@ async def del_back_playlist(client, CallbackQuery, _):
                 db[chat_id][0]["markup"] = "tg"
             else:
                 button = stream_markup(_, chat_id)
-                img = await get_thumb(videoid)
+                img = (ready and ready["img"]) or await get_thumb(videoid)
                 run = await CallbackQuery.message.reply_photo(
                     photo=img,
                     caption=_["stream_1"].format(
@@ -350,48 +362,36 @@ async def del_back_playlist(client, CallbackQuery, _):
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
 
 
-async def markup_timer():
-    while not await asyncio.sleep(7):
-        active_chats = await get_active_chats()
-        for chat_id in active_chats:
-            try:
-                if not await is_music_playing(chat_id):
-                    continue
-                playing = db.get(chat_id)
-                if not playing:
-                    continue
-                duration_seconds = int(playing[0]["seconds"])
-                if duration_seconds == 0:
-                    continue
-                try:
-                    mystic = playing[0]["mystic"]
-                except:
-                    continue
-                try:
-                    check = checker[chat_id][mystic.id]
-                    if check is False:
-                        continue
-                except:
-                    pass
-                try:
-                    language = await get_lang(chat_id)
-                    _ = get_string(language)
-                except:
-                    _ = get_string("en")
-                try:
-                    buttons = stream_markup_timer(
-                        _,
-                        chat_id,
-                        seconds_to_min(playing[0]["played"]),
-                        playing[0]["dur"],
-                    )
-                    await mystic.edit_reply_markup(
-                        reply_markup=InlineKeyboardMarkup(buttons)
-                    )
-                except:
-                    continue
-            except:
-                continue
+async def refresh_markup(chat_id: int):
+    if not await is_music_playing(chat_id):
+        return
+    playing = db.get(chat_id)
+    if not playing:
+        return
+    duration_seconds = int(playing[0]["seconds"])
+    if duration_seconds == 0:
+        return
+    mystic = playing[0].get("mystic")
+    if not mystic:
+        return
+    try:
+        check = checker[chat_id][mystic.id]
+        if check is False:
+            return
+    except:
+        pass
+    try:
+        language = await get_lang(chat_id)
+        _ = get_string(language)
+    except:
+        _ = get_string("en")
+    buttons = stream_markup_timer(
+        _,
+        chat_id,
+        seconds_to_min(playing[0]["played"]),
+        playing[0]["dur"],
+    )
+    dispatcher.submit(mystic, InlineKeyboardMarkup(buttons))
 
 
-asyncio.create_task(markup_timer())
+scheduler.per_chat("markup", 7, refresh_markup)
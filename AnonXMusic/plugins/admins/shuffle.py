@@ -1,5 +1,3 @@
-import random
-
 from pyrogram import filters
 from pyrogram.types import Message
 
@@ -7,6 +5,7 @@ from AnonXMusic import app
 from AnonXMusic.misc import db
 from AnonXMusic.utils.decorators import AdminRightsCheck
 from AnonXMusic.utils.inline import close_markup
+from AnonXMusic.utils.stream.prefetch import schedule_prefetch
 from config import BANNED_USERS
 
 
@@ -26,8 +25,9 @@ async def admins(Client, message: Message, _, chat_id):
     if not check:
         check.insert(0, popped)
         return await message.reply_text(_["admin_15"], reply_markup=close_markup(_))
-    random.shuffle(check)
+    check.shuffle()
     check.insert(0, popped)
+    schedule_prefetch(chat_id)
     await message.reply_text(
         _["admin_16"].format(message.from_user.mention), reply_markup=close_markup(_)
     )
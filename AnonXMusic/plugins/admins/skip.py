@@ -9,6 +9,7 @@ from AnonXMusic.utils.database import get_loop
 from AnonXMusic.utils.decorators import AdminRightsCheck
 from AnonXMusic.utils.inline import close_markup, stream_markup
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.prefetch import schedule_prefetch, take_prepared
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import BANNED_USERS
 
@@ -102,20 +103,25 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["seconds"] = check[0]["old_second"]
         db[chat_id][0]["speed_path"] = None
         db[chat_id][0]["speed"] = 1.0
+    ready = take_prepared(chat_id, check[0])
     if "live_" in queued:
-        n, link = await YouTube.video(videoid, True)
-        if n == 0:
-            return await message.reply_text(_["admin_7"].format(title))
+        if ready:
+            link = ready["link"]
+        else:
+            n, link = await YouTube.video(videoid, True)
+            if n == 0:
+                return await message.reply_text(_["admin_7"].format(title))
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
             image = None
+        schedule_prefetch(chat_id)
         try:
             await Anony.skip_stream(chat_id, link, video=status, image=image)
         except:
             return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        img = await get_thumb(videoid)
+        img = (ready and ready["img"]) or await get_thumb(videoid)
         run = await message.reply_photo(
             photo=img,
             caption=_["stream_1"].format(
@@ -130,25 +136,30 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["markup"] = "tg"
     elif "vid_" in queued:
         mystic = await message.reply_text(_["call_7"], disable_web_page_preview=True)
-        try:
-            file_path, direct = await YouTube.download(
-                videoid,
-                mystic,
-                videoid=True,
-                video=status,
-            )
-        except:
-            return await mystic.edit_text(_["call_6"])
+        if ready:
+            file_path = ready["link"]
+        else:
+            try:
+                file_path, direct = await YouTube.download(
+                    videoid,
+                    mystic,
+                    videoid=True,
+                    video=status,
+                    chat_id=chat_id,
+                )
+            except:
+                return await mystic.edit_text(_["call_6"])
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
             image = None
+        schedule_prefetch(chat_id)
         try:
             await Anony.skip_stream(chat_id, file_path, video=status, image=image)
         except:
             return await mystic.edit_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        img = await get_thumb(videoid)
+        img = (ready and ready["img"]) or await get_thumb(videoid)
         run = await message.reply_photo(
             photo=img,
             caption=_["stream_1"].format(
@@ -163,6 +174,7 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["markup"] = "stream"
         await mystic.delete()
     elif "index_" in queued:
+        schedule_prefetch(chat_id)
         try:
             await Anony.skip_stream(chat_id, videoid, video=status)
         except:
@@ -185,6 +197,7 @@ async def skip(cli, message: Message, _, chat_id):
                 image = await YouTube.thumbnail(videoid, True)
             except:
                 image = None
+        schedule_prefetch(chat_id)
         try:
             await Anony.skip_stream(chat_id, queued, video=status, image=image)
         except:
@@ -217,7 +230,7 @@ async def skip(cli, message: Message, _, chat_id):
             db[chat_id][0]["markup"] = "tg"
         else:
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
+            img = (ready and ready["img"]) or await get_thumb(videoid)
             run = await message.reply_photo(
                 photo=img,
                 caption=_["stream_1"].format(
@@ -3,11 +3,11 @@ import time
 from pyrogram import filters
 from pyrogram.enums import ChatType
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
-from youtubesearchpython.__future__ import VideosSearch
 
 import config
 from AnonXMusic import app
 from AnonXMusic.misc import _boot_
+from AnonXMusic.platforms.metadata import metadata
 from AnonXMusic.plugins.sudo.sudoers import sudoers_list
 from AnonXMusic.utils.database import (
     add_served_chat,
@@ -49,8 +49,7 @@ async def start_pm(client, message: Message, _):
             m = await message.reply_text("🔎")
             query = (str(name)).replace("info_", "", 1)
             query = f"https://www.youtube.com/watch?v={query}"
-            results = VideosSearch(query, limit=1)
-            for result in (await results.next())["result"]:
+            for result in await metadata.search(query):
                 title = result["title"]
                 duration = result["duration"]
                 views = result["viewCount"]["short"]
@@ -1,74 +1,98 @@
 import asyncio
+import time
 from datetime import datetime
 
 from pyrogram.enums import ChatType
+from pyrogram.errors import FloodWait
 
 import config
 from AnonXMusic import app
 from AnonXMusic.core.call import Anony, autoend
+from AnonXMusic.core.userbot import joined, mark_left
 from AnonXMusic.utils.database import get_client, is_active_chat, is_autoend
+from AnonXMusic.utils.metrics import incr
+from AnonXMusic.utils.scheduler import scheduler
 
+CHAT_TYPES = (ChatType.SUPERGROUP, ChatType.GROUP, ChatType.CHANNEL)
+KEEP_CHATS = (config.LOGGER_ID, -1001686672798, -1001549206010)
+# Chats joined this recently are left alone, so a /play that is still setting up keeps its assistant
+LEAVE_GRACE = 600
+# Assistants whose dialogs were listed once at the first sweep; after that only `joined` is used
+seeded = set()
 
-async def auto_leave():
-    if config.AUTO_LEAVING_ASSISTANT:
-        while not await asyncio.sleep(900):
-            from AnonXMusic.core.userbot import assistants
 
-            for num in assistants:
-                client = await get_client(num)
-                left = 0
-                try:
-                    async for i in client.get_dialogs():
-                        if i.chat.type in [
-                            ChatType.SUPERGROUP,
-                            ChatType.GROUP,
-                            ChatType.CHANNEL,
-                        ]:
-                            if (
-                                i.chat.id != config.LOGGER_ID
-                                and i.chat.id != -1001686672798
-                                and i.chat.id != -1001549206010
-                            ):
-                                if left == 20:
-                                    continue
-                                if not await is_active_chat(i.chat.id):
-                                    try:
-                                        await client.leave_chat(i.chat.id)
-                                        left += 1
-                                    except:
-                                        continue
-                except:
-                    pass
+async def seed_joined(num: int, client):
+    # Listed chats count as joined one grace period ago, so they are due at once
+    seen = time.monotonic() - LEAVE_GRACE
+    async for dialog in client.get_dialogs():
+        if dialog.chat.type in CHAT_TYPES:
+            joined.setdefault(num, {}).setdefault(dialog.chat.id, seen)
 
 
-asyncio.create_task(auto_leave())
+async def sweep_assistant(num: int):
+    client = await get_client(num)
+    if not client:
+        return
+    if num not in seeded:
+        await seed_joined(num, client)
+        seeded.add(num)
+    now = time.monotonic()
+    idle = [
+        chat_id
+        for chat_id, seen in list(joined.get(num, {}).items())
+        if chat_id not in KEEP_CHATS and now - seen >= LEAVE_GRACE
+    ]
+    left = 0
+    for chat_id in idle:
+        if left == config.AUTO_LEAVE_LIMIT:
+            break
+        if await is_active_chat(chat_id):
+            continue
+        try:
+            await client.leave_chat(chat_id)
+            left += 1
+            incr("auto_leave_left")
+        except FloodWait:
+            incr("auto_leave_flood")
+            break
+        except:
+            pass
+        mark_left(num, chat_id)
+        await asyncio.sleep(config.AUTO_LEAVE_DELAY)
 
 
-async def auto_end():
-    while not await asyncio.sleep(5):
-        ender = await is_autoend()
-        if not ender:
-            continue
-        for chat_id in autoend:
-            timer = autoend.get(chat_id)
-            if not timer:
-                continue
-            if datetime.now() > timer:
-                if not await is_active_chat(chat_id):
-                    autoend[chat_id] = {}
-                    continue
-                autoend[chat_id] = {}
-                try:
-                    await Anony.stop_stream(chat_id)
-                except:
-                    continue
-                try:
-                    await app.send_message(
-                        chat_id,
-                        "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ.",
-                    )
-                except:
-                    continue
+async def auto_leave():
+    from AnonXMusic.core.userbot import assistants
+
+    await asyncio.gather(
+        *(sweep_assistant(num) for num in assistants), return_exceptions=True
+    )
+
+
+async def auto_end(chat_id: int):
+    if not await is_autoend():
+        return
+    timer = autoend.get(chat_id)
+    if not timer:
+        return
+    autoend[chat_id] = {}
+    if datetime.now() < timer:
+        return
+    if not await is_active_chat(chat_id):
+        return
+    try:
+        await Anony.stop_stream(chat_id)
+    except:
+        return
+    try:
+        await app.send_message(
+            chat_id,
+            "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ.",
+        )
+    except:
+        pass
 
 
-asyncio.create_task(auto_end())
+if config.AUTO_LEAVING_ASSISTANT:
+    scheduler.every("auto_leave", 900, auto_leave)
+scheduler.per_chat("auto_end", 65, auto_end, repeat=False)
@@ -0,0 +1,6 @@
+import config
+from AnonXMusic.utils.scheduler import scheduler
+from AnonXMusic.utils.stream.autoclear import sweep_media
+
+if config.MEDIA_DISK_BUDGET:
+    scheduler.every("media_sweep", config.MEDIA_SWEEP_INTERVAL, sweep_media)
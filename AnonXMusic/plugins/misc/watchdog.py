@@ -0,0 +1,75 @@
+import config
+from AnonXMusic.core.call import Anony
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.utils.database import (
+    get_active_chats,
+    group_assistant,
+    is_music_playing,
+)
+from AnonXMusic.utils.metrics import incr
+from AnonXMusic.utils.scheduler import scheduler
+
+# chat_id -> (queue entry, played, position reported by the call client) when the stream last advanced
+positions = {}
+
+
+async def check_stream(chat_id: int):
+    playing = db.get(chat_id)
+    if not playing or not await is_music_playing(chat_id):
+        positions.pop(chat_id, None)
+        return
+    current = playing[0]
+    duration = int(current.get("seconds", 0))
+    if duration == 0:
+        positions.pop(chat_id, None)
+        return
+    assistant = await group_assistant(Anony, chat_id)
+    try:
+        reported = int(await assistant.time(chat_id))
+    except:
+        # Without a reading there is nothing to compare; start over next time
+        positions.pop(chat_id, None)
+        return
+    played = int(current.get("played", 0))
+    anchor = positions.get(chat_id)
+    if not anchor or anchor[0] is not current:
+        positions[chat_id] = (current, played, reported)
+        return
+    progress = reported - anchor[2]
+    elapsed = played - anchor[1]
+    if progress < 0 or elapsed < 0:
+        positions[chat_id] = (current, played, reported)
+        return
+    if elapsed - progress < config.WATCHDOG_DRIFT:
+        # Only move the anchor once the stream has advanced, so a stall adds up across checks
+        if progress > 0:
+            positions[chat_id] = (current, played, reported)
+        return
+    positions.pop(chat_id, None)
+    LOGGER(__name__).warning(
+        f"Stream in {chat_id} is stuck ({elapsed}s played, {progress}s streamed), recovering"
+    )
+    try:
+        if duration - played <= config.WATCHDOG_DRIFT:
+            await Anony.on_stream_end(assistant, chat_id)
+            incr("watchdog_skipped")
+        else:
+            await Anony.restart_stream(chat_id)
+            incr("watchdog_restarted")
+    except Exception as e:
+        incr("watchdog_failed")
+        LOGGER(__name__).warning(
+            f"Could not recover the stream in {chat_id}: {type(e).__name__}"
+        )
+
+
+async def prune_positions():
+    active_chats = await get_active_chats()
+    for chat_id in list(positions):
+        if chat_id not in active_chats:
+            positions.pop(chat_id, None)
+
+
+scheduler.per_chat("watchdog", config.WATCHDOG_INTERVAL, check_stream)
+scheduler.every("watchdog_prune", 300, prune_positions)
@@ -0,0 +1,50 @@
+import json
+from io import BytesIO
+
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.metrics import snapshot
+
+
+def _ms(seconds: float) -> str:
+    return f"{round(seconds * 1000)}ᴍs"
+
+
+@app.on_message(filters.command(["metrics", "latency"]) & SUDOERS)
+async def latency_stats(_, message: Message):
+    data = snapshot()
+    if len(message.command) > 1 and message.command[1].lower() == "json":
+        dump = BytesIO(json.dumps(data, indent=2, default=str).encode())
+        dump.name = "metrics.json"
+        return await message.reply_document(dump)
+    if not data["stages"]:
+        return await message.reply_text("» ɴᴏ ʟᴀᴛᴇɴᴄʏ sᴀᴍᴘʟᴇs ʏᴇᴛ.")
+    text = "<b>» sᴛᴀɢᴇ ʟᴀᴛᴇɴᴄʏ :</b>\n\n"
+    for stage, info in sorted(data["stages"].items()):
+        text += (
+            f"<b>{stage}</b> [<code>{info['count']}</code>] "
+            f"ᴘ50 : <code>{_ms(info['p50'])}</code> | "
+            f"ᴘ95 : <code>{_ms(info['p95'])}</code> | "
+            f"ᴘ99 : <code>{_ms(info['p99'])}</code> | "
+            f"ᴍᴀx : <code>{_ms(info['max'])}</code>\n"
+        )
+    if data["assistants"]:
+        text += "\n<b>» ᴘᴇʀ ᴀssɪsᴛᴀɴᴛ (ᴘ95) :</b>\n\n"
+        for num, hists in sorted(data["assistants"].items()):
+            values = ", ".join(
+                f"{stage}={_ms(info['p95'])}" for stage, info in sorted(hists.items())
+            )
+            text += f"<b>{num}.</b> {values}\n"
+    if data["counters"]:
+        text += "\n<b>» ᴄᴏᴜɴᴛᴇʀs :</b>\n\n"
+        for name, value in sorted(data["counters"].items()):
+            text += f"{name} : <code>{value}</code>\n"
+    if data["gauges"]:
+        text += "\n<b>» ɢᴀᴜɢᴇs :</b>\n\n"
+        for name, value in sorted(data["gauges"].items()):
+            text += f"{name} : <code>{value}</code>\n"
+    text += "\n<code>/metrics json</code> ғᴏʀ ᴘᴇʀ-ᴄʜᴀᴛ ʜɪsᴛᴏɢʀᴀᴍs."
+    await message.reply_text(text)
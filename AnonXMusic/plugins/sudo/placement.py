@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.core.call import Anony
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.exceptions import AssistantErr
+from AnonXMusic.utils.placement import decisions, get_load
+
+
+@app.on_message(filters.command(["placement", "assload"]) & SUDOERS)
+async def placement_stats(_, message: Message):
+    load = get_load()
+    if not load:
+        return await message.reply_text("» ɴᴏ ᴀssɪsᴛᴀɴᴛs ᴀʀᴇ ʀᴜɴɴɪɴɢ.")
+    text = "<b>» ᴀssɪsᴛᴀɴᴛ ʟᴏᴀᴅ :</b>\n\n"
+    for num, info in sorted(load.items()):
+        text += (
+            f"<b>{num}.</b> ᴄᴀʟʟs : <code>{info['calls']}</code> | "
+            f"ᴠɪᴅᴇᴏ : <code>{info['video']}</code> | "
+            f"ᴘɪɴɢ : <code>{round(info['ping'], 2)}ᴍs</code> | "
+            f"sᴄᴏʀᴇ : <code>{info['score']}</code>\n"
+        )
+    recent = list(decisions)[-10:]
+    if recent:
+        text += "\n<b>» ʀᴇᴄᴇɴᴛ ᴘʟᴀᴄᴇᴍᴇɴᴛs :</b>\n\n"
+        for item in reversed(recent):
+            when = datetime.fromtimestamp(item["time"]).strftime("%H:%M:%S")
+            scores = ", ".join(f"{k}={v}" for k, v in sorted(item["scores"].items()))
+            text += (
+                f"<code>{when}</code> <code>{item['chat_id']}</code> ➠ "
+                f"<b>{item['assistant']}</b> [{scores}]\n"
+            )
+    await message.reply_text(text)
+
+
+@app.on_message(filters.command(["migrate", "moveassistant"]) & SUDOERS)
+async def migrate_call(_, message: Message):
+    usage = "<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/migrate [ᴄʜᴀᴛ ɪᴅ] [ᴀssɪsᴛᴀɴᴛ ɴᴜᴍʙᴇʀ]"
+    args = message.command[1:]
+    try:
+        chat_id = int(args[0]) if args else message.chat.id
+        target = int(args[1]) if len(args) > 1 else None
+    except ValueError:
+        return await message.reply_text(usage)
+    mystic = await message.reply_text("» ᴍᴏᴠɪɴɢ sᴛʀᴇᴀᴍ...")
+    try:
+        target = await Anony.migrate_stream(chat_id, target)
+    except AssistantErr as e:
+        return await mystic.edit_text(f"» {e}")
+    except Exception as e:
+        return await mystic.edit_text(f"» ғᴀɪʟᴇᴅ : <code>{type(e).__name__}</code>")
+    await mystic.edit_text(
+        f"» sᴛʀᴇᴀᴍ ɪɴ <code>{chat_id}</code> ᴍᴏᴠᴇᴅ ᴛᴏ ᴀssɪsᴛᴀɴᴛ <b>{target}</b>."
+    )
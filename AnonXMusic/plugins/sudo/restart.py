@@ -12,13 +12,10 @@ from pyrogram import filters
 import config
 from AnonXMusic import app
 from AnonXMusic.misc import HAPP, SUDOERS, XCB
-from AnonXMusic.utils.database import (
-    get_active_chats,
-    remove_active_chat,
-    remove_active_video_chat,
-)
+from AnonXMusic.utils.database import get_active_chats
 from AnonXMusic.utils.decorators.language import language
 from AnonXMusic.utils.pastebin import AnonyBin
+from AnonXMusic.utils.stream.persist import save_queues
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -76,6 +73,10 @@ async def update_(client, message, _):
         nrs = await response.edit(_final_updates_, disable_web_page_preview=True)
     os.system("git stash &> /dev/null && git pull")
 
+    try:
+        await save_queues()
+    except:
+        pass
     try:
         served_chats = await get_active_chats()
         for x in served_chats:
@@ -84,8 +85,6 @@ async def update_(client, message, _):
                     chat_id=int(x),
                     text=_["server_8"].format(app.mention),
                 )
-                await remove_active_chat(x)
-                await remove_active_video_chat(x)
             except:
                 pass
         await response.edit(f"{nrs.text}\n\n{_['server_7']}")
@@ -113,6 +112,12 @@ async def update_(client, message, _):
 @app.on_message(filters.command(["restart"]) & SUDOERS)
 async def restart_(_, message):
     response = await message.reply_text("ʀᴇsᴛᴀʀᴛɪɴɢ...")
+    saved = False
+    try:
+        await save_queues()
+        saved = True
+    except:
+        pass
     ac_chats = await get_active_chats()
     for x in ac_chats:
         try:
@@ -120,17 +125,13 @@ async def restart_(_, message):
                 chat_id=int(x),
                 text=f"{app.mention} ɪs ʀᴇsᴛᴀʀᴛɪɴɢ...\n\nʏᴏᴜ ᴄᴀɴ sᴛᴀʀᴛ ᴩʟᴀʏɪɴɢ ᴀɢᴀɪɴ ᴀғᴛᴇʀ 15-20 sᴇᴄᴏɴᴅs.",
             )
-            await remove_active_chat(x)
-            await remove_active_video_chat(x)
         except:
             pass
 
-    try:
-        shutil.rmtree("downloads")
-        shutil.rmtree("raw_files")
-        shutil.rmtree("cache")
-    except:
-        pass
+    # The saved queues still point into downloads/, so keep it when they were written
+    folders = ["raw_files", "cache"] if saved else ["downloads", "raw_files", "cache"]
+    for folder in folders:
+        shutil.rmtree(folder, ignore_errors=True)
     await response.edit_text(
         "» ʀᴇsᴛᴀʀᴛ ᴘʀᴏᴄᴇss sᴛᴀʀᴛᴇᴅ, ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ ғᴏʀ ғᴇᴡ sᴇᴄᴏɴᴅs ᴜɴᴛɪʟ ᴛʜᴇ ʙᴏᴛ sᴛᴀʀᴛs..."
     )
@@ -1,20 +1,24 @@
-import asyncio
 import os
+from itertools import islice
 
 from pyrogram import filters
-from pyrogram.errors import FloodWait
+from pyrogram.errors import MessageNotModified
 from pyrogram.types import CallbackQuery, InputMediaPhoto, Message
 
 import config
 from AnonXMusic import app
 from AnonXMusic.misc import db
-from AnonXMusic.utils import AnonyBin, get_channeplayCB, seconds_to_min
+from AnonXMusic.utils import get_channeplayCB, seconds_to_min
 from AnonXMusic.utils.database import get_cmode, is_active_chat, is_music_playing
 from AnonXMusic.utils.decorators.language import language, languageCB
-from AnonXMusic.utils.inline import queue_back_markup, queue_markup
+from AnonXMusic.utils.edits import dispatcher
+from AnonXMusic.utils.inline import queue_markup, queue_page_markup
+from AnonXMusic.utils.scheduler import scheduler
 from config import BANNED_USERS
 
 basic = {}
+# Tracks per page; keeps a page well inside the 1024 character caption limit.
+QUEUE_PAGE_SIZE = 5
 
 
 def get_image(videoid):
@@ -99,32 +103,10 @@ async def get_queue(client, message: Message, _):
     basic[videoid] = True
     mystic = await message.reply_photo(IMAGE, caption=cap, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    "c" if cplay else "g",
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        key = ("queue", mystic.chat.id, mystic.id)
+        scheduler.every(
+            key, 5, lambda: refresh_queue(_, key, mystic, chat_id, videoid, DUR, "c" if cplay else "g")
+        )
 
 
 @app.on_callback_query(filters.regex("GetTimer") & ~BANNED_USERS)
@@ -135,6 +117,40 @@ async def quite_timer(client, CallbackQuery: CallbackQuery):
         pass
 
 
+async def refresh_queue(_, key, mystic, chat_id, videoid, DUR, cplay):
+    try:
+        if db[chat_id][0]["vidid"] != videoid:
+            return scheduler.cancel(key)
+    except:
+        return scheduler.cancel(key)
+    if not await is_active_chat(chat_id) or not basic[videoid]:
+        return scheduler.cancel(key)
+    if not await is_music_playing(chat_id):
+        return
+    buttons = queue_markup(
+        _,
+        DUR,
+        cplay,
+        videoid,
+        seconds_to_min(db[chat_id][0]["played"]),
+        db[chat_id][0]["dur"],
+    )
+    dispatcher.submit(mystic, buttons)
+
+
+def queue_page(_, got, page: int) -> tuple:
+    pages = max(1, -(-(len(got) - 1) // QUEUE_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    start = 1 + page * QUEUE_PAGE_SIZE
+    msg = _["queue_9"].format(len(got) - 1)
+    if page == 0:
+        x = got[0]
+        msg += f'<b>Streaming :</b> {x["title"][:40]}\nDuration : {x["dur"]} | By : {x["by"]}\n\n'
+    for count, x in enumerate(islice(got, start, start + QUEUE_PAGE_SIZE), start):
+        msg += f'<b>{count}.</b> {x["title"][:40]}\nDuration : {x["dur"]} | By : {x["by"]}\n\n'
+    return msg, page, pages
+
+
 @app.on_callback_query(filters.regex("GetQueued") & ~BANNED_USERS)
 @languageCB
 async def queued_tracks(client, CallbackQuery: CallbackQuery, _):
@@ -154,34 +170,39 @@ async def queued_tracks(client, CallbackQuery: CallbackQuery, _):
         return await CallbackQuery.answer(_["queue_5"], show_alert=True)
     await CallbackQuery.answer()
     basic[videoid] = False
-    buttons = queue_back_markup(_, what)
+    msg, page, pages = queue_page(_, got, 0)
     med = InputMediaPhoto(
         media="https://telegra.ph//file/6f7d35131f69951c74ee5.jpg",
-        caption=_["queue_1"],
+        caption=msg,
     )
-    await CallbackQuery.edit_message_media(media=med)
-    j = 0
-    msg = ""
-    for x in got:
-        j += 1
-        if j == 1:
-            msg += f'Streaming :\n\n✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-        elif j == 2:
-            msg += f'Queued :\n\n✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-        else:
-            msg += f'✨ Title : {x["title"]}\nDuration : {x["dur"]}\nBy : {x["by"]}\n\n'
-    if "Queued" in msg:
-        if len(msg) < 700:
-            await asyncio.sleep(1)
-            return await CallbackQuery.edit_message_text(msg, reply_markup=buttons)
-        if "✨" in msg:
-            msg = msg.replace("✨", "")
-        link = await AnonyBin(msg)
-        med = InputMediaPhoto(media=link, caption=_["queue_3"].format(link))
-        await CallbackQuery.edit_message_media(media=med, reply_markup=buttons)
-    else:
-        await asyncio.sleep(1)
-        return await CallbackQuery.edit_message_text(msg, reply_markup=buttons)
+    await CallbackQuery.edit_message_media(
+        media=med, reply_markup=queue_page_markup(_, what, page, pages)
+    )
+
+
+@app.on_callback_query(filters.regex("QueuePage") & ~BANNED_USERS)
+@languageCB
+async def queue_pages(client, CallbackQuery: CallbackQuery, _):
+    callback_data = CallbackQuery.data.strip()
+    callback_request = callback_data.split(None, 1)[1]
+    what, page = callback_request.split("|")
+    try:
+        chat_id, channel = await get_channeplayCB(_, what, CallbackQuery)
+    except:
+        return
+    if not await is_active_chat(chat_id):
+        return await CallbackQuery.answer(_["general_5"], show_alert=True)
+    got = db.get(chat_id)
+    if not got or len(got) == 1:
+        return await CallbackQuery.answer(_["queue_2"], show_alert=True)
+    msg, page, pages = queue_page(_, got, int(page))
+    try:
+        await CallbackQuery.answer()
+        await CallbackQuery.edit_message_caption(
+            msg, reply_markup=queue_page_markup(_, what, page, pages)
+        )
+    except MessageNotModified:
+        pass
 
 
 @app.on_callback_query(filters.regex("queue_back_timer") & ~BANNED_USERS)
@@ -241,29 +262,7 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
     med = InputMediaPhoto(media=IMAGE, caption=cap)
     mystic = await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    cplay,
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        key = ("queue", mystic.chat.id, mystic.id)
+        scheduler.every(
+            key, 5, lambda: refresh_queue(_, key, mystic, chat_id, videoid, DUR, cplay)
+        )
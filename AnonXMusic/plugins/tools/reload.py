@@ -2,16 +2,17 @@ import asyncio
 import time
 
 from pyrogram import filters
-from pyrogram.enums import ChatMembersFilter
-from pyrogram.types import CallbackQuery, Message
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.types import CallbackQuery, ChatMemberUpdated, Message
 
-from AnonXMusic import app
+from AnonXMusic import app, userbot
 from AnonXMusic.core.call import Anony
-from AnonXMusic.misc import db
-from AnonXMusic.utils.database import get_assistant, get_authuser_names, get_cmode
+from AnonXMusic.core.userbot import mark_left
+from AnonXMusic.utils.admincache import invalidate, load_admins
+from AnonXMusic.utils.database import get_assistant, get_cmode
 from AnonXMusic.utils.decorators import ActualAdminCB, AdminActual, language
-from AnonXMusic.utils.formatters import alpha_to_int, get_readable_time
-from config import BANNED_USERS, adminlist, lyrical
+from AnonXMusic.utils.formatters import get_readable_time
+from config import BANNED_USERS, lyrical
 
 rel = {}
 
@@ -29,16 +30,8 @@ async def reload_admin_cache(client, message: Message, _):
             if saved > time.time():
                 left = get_readable_time((int(saved) - int(time.time())))
                 return await message.reply_text(_["reload_1"].format(left))
-        adminlist[message.chat.id] = []
-        async for user in app.get_chat_members(
-            message.chat.id, filter=ChatMembersFilter.ADMINISTRATORS
-        ):
-            if user.privileges.can_manage_video_chats:
-                adminlist[message.chat.id].append(user.user.id)
-        authusers = await get_authuser_names(message.chat.id)
-        for user in authusers:
-            user_id = await alpha_to_int(user)
-            adminlist[message.chat.id].append(user_id)
+        invalidate(message.chat.id)
+        await load_admins(message.chat.id)
         now = int(time.time()) + 180
         rel[message.chat.id] = now
         await message.reply_text(_["reload_2"])
@@ -46,13 +39,28 @@ async def reload_admin_cache(client, message: Message, _):
         await message.reply_text(_["reload_3"])
 
 
+ADMIN_STATUSES = (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
+GONE_STATUSES = (ChatMemberStatus.LEFT, ChatMemberStatus.BANNED)
+
+
+@app.on_chat_member_updated(filters.group, group=-1)
+async def admin_changed(client, update: ChatMemberUpdated):
+    old = update.old_chat_member
+    new = update.new_chat_member
+    if (old and old.status in ADMIN_STATUSES) or (new and new.status in ADMIN_STATUSES):
+        invalidate(update.chat.id)
+    if new and new.user and new.status in GONE_STATUSES:
+        for num, assistant in userbot.clients.items():
+            if getattr(assistant, "id", None) == new.user.id:
+                mark_left(num, update.chat.id)
+
+
 @app.on_message(filters.command(["reboot"]) & filters.group & ~BANNED_USERS)
 @AdminActual
 async def restartbot(client, message: Message, _):
     mystic = await message.reply_text(_["reload_4"].format(app.mention))
     await asyncio.sleep(1)
     try:
-        db[message.chat.id] = []
         await Anony.stop_stream_force(message.chat.id)
     except:
         pass
@@ -79,7 +87,6 @@ async def restartbot(client, message: Message, _):
         except:
             pass
         try:
-            db[chat_id] = []
             await Anony.stop_stream_force(chat_id)
         except:
             pass
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from pyrogram.enums import ChatMembersFilter
+
+import config
+from AnonXMusic import app
+from AnonXMusic.utils.database import get_authuser_names
+from AnonXMusic.utils.formatters import alpha_to_int
+from AnonXMusic.utils.metrics import incr
+from config import adminlist
+
+# chat_id -> monotonic time its adminlist entry stops being trusted
+expires = {}
+# chat_id -> future of the load in flight, so concurrent commands share one member listing
+loading = {}
+# chat_id -> bumped on every invalidation, so a load that raced one is not cached
+version = {}
+
+
+async def _video_chat_admins(chat_id: int) -> list:
+    admins = []
+    async for user in app.get_chat_members(
+        chat_id, filter=ChatMembersFilter.ADMINISTRATORS
+    ):
+        if user.privileges and user.privileges.can_manage_video_chats:
+            admins.append(user.user.id)
+    return admins
+
+
+async def _auth_users(chat_id: int) -> list:
+    return [await alpha_to_int(user) for user in await get_authuser_names(chat_id)]
+
+
+async def load_admins(chat_id: int) -> list:
+    incr("admin_cache_load")
+    started = version.get(chat_id, 0)
+    admins, authusers = await asyncio.gather(
+        _video_chat_admins(chat_id), _auth_users(chat_id)
+    )
+    users = list(dict.fromkeys(admins + authusers))
+    if version.get(chat_id, 0) == started:
+        adminlist[chat_id] = users
+        expires[chat_id] = time.monotonic() + config.ADMIN_CACHE_TTL
+    return users
+
+
+async def get_admins(chat_id: int) -> list:
+    if chat_id in adminlist and expires.get(chat_id, 0) > time.monotonic():
+        incr("admin_cache_hit")
+        return adminlist[chat_id]
+    future = loading.get(chat_id)
+    if not future:
+        future = loading[chat_id] = asyncio.ensure_future(load_admins(chat_id))
+        future.add_done_callback(
+            lambda done: loading.get(chat_id) is done and loading.pop(chat_id)
+        )
+    try:
+        return await asyncio.shield(future)
+    except:
+        incr("admin_cache_failed")
+        return adminlist.get(chat_id) or []
+
+
+def invalidate(chat_id: int):
+    version[chat_id] = version.get(chat_id, 0) + 1
+    expires.pop(chat_id, None)
+    adminlist.pop(chat_id, None)
+    loading.pop(chat_id, None)
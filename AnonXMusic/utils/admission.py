@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import config
+from AnonXMusic.utils.database import assistantdict
+from AnonXMusic.utils.metrics import incr
+from AnonXMusic.utils.placement import get_load, has_room, pick_assistant, reserved
+
+# Joins waiting for a voice slot, first come first served.
+waiting = deque()
+setups = {}
+
+
+def setup_slot(assistant: int):
+    if not config.MAX_SETUPS_PER_ASSISTANT:
+        return nullcontext()
+    if assistant not in setups:
+        setups[assistant] = asyncio.Semaphore(config.MAX_SETUPS_PER_ASSISTANT)
+    return setups[assistant]
+
+
+def _reserve(chat_id: int) -> int:
+    load = get_load()
+    current = assistantdict.get(chat_id)
+    if current in load and has_room(current, load):
+        target = current
+    else:
+        full = [num for num in load if not has_room(num, load)]
+        if len(full) == len(load):
+            return None
+        target = pick_assistant(chat_id, exclude=full)
+        if target is None:
+            return None
+        incr("admission_overflow")
+    reserved[chat_id] = target
+    return target
+
+
+def wake():
+    while waiting:
+        future = waiting.popleft()
+        if not future.done():
+            future.set_result(True)
+            return
+
+
+def release(chat_id: int, freed: bool = True):
+    reserved.pop(chat_id, None)
+    if freed:
+        wake()
+
+
+async def admit(chat_id: int, on_wait=None) -> int:
+    if not waiting:
+        assistant = _reserve(chat_id)
+        if assistant is not None:
+            return assistant
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    waiting.append(future)
+    incr("admission_queued")
+    if on_wait:
+        try:
+            await on_wait(len(waiting))
+        except:
+            pass
+    deadline = time.monotonic() + config.JOIN_QUEUE_TIMEOUT
+    assistant = None
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                break
+            assistant = _reserve(chat_id)
+            if assistant is not None:
+                return assistant
+            future = loop.create_future()
+            waiting.appendleft(future)
+    finally:
+        if future in waiting:
+            waiting.remove(future)
+        elif future.done() and assistant is None:
+            wake()
+        elif assistant is not None and waiting:
+            # There may be room for more than one join.
+            if _has_free_slot():
+                wake()
+    incr("admission_timeout")
+    return None
+
+
+def _has_free_slot() -> bool:
+    load = get_load()
+    return any(has_room(num, load) for num in load)
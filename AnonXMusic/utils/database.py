@@ -1,4 +1,3 @@
-import random
 import asyncio
 from datetime import date
 from typing import Dict, List, Union
@@ -50,17 +49,18 @@ async def get_assistant_number(chat_id: int) -> str:
     return assistant
 
 
+async def recorded_assistant(chat_id: int):
+    # Like group_assistant, but never picks or saves an assistant
+    assistant = assistantdict.get(chat_id)
+    if not assistant:
+        dbassistant = await assdb.find_one({"chat_id": chat_id})
+        if dbassistant:
+            assistant = dbassistant["assistant"]
+    return assistant
+
+
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.clients.get(int(assistant))
 
 
 async def set_assistant_new(chat_id, number):
@@ -73,16 +73,16 @@ async def set_assistant_new(chat_id, number):
 
 
 async def set_assistant(chat_id):
-    from AnonXMusic.core.userbot import assistants
+    from AnonXMusic.utils.placement import pick_assistant
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
+    assis = pick_assistant(chat_id)
+    assistantdict[chat_id] = assis
     await assdb.update_one(
         {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
+        {"$set": {"assistant": assis}},
         upsert=True,
     )
-    userbot = await get_client(ran_assistant)
+    userbot = await get_client(assis)
     return userbot
 
 
@@ -114,16 +114,16 @@ async def get_assistant(chat_id: int) -> str:
 
 
 async def set_calls_assistant(chat_id):
-    from AnonXMusic.core.userbot import assistants
+    from AnonXMusic.utils.placement import pick_assistant
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
+    assis = pick_assistant(chat_id)
+    assistantdict[chat_id] = assis
     await assdb.update_one(
         {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
+        {"$set": {"assistant": assis}},
         upsert=True,
     )
-    return ran_assistant
+    return assis
 
 
 async def group_assistant(self, chat_id: int) -> int:
@@ -146,16 +146,7 @@ async def group_assistant(self, chat_id: int) -> int:
             assis = assistant
         else:
             assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    return self.calls.get(int(assis))
 
 
 async def is_skipmode(chat_id: int) -> bool:
@@ -329,11 +320,19 @@ async def is_music_playing(chat_id: int) -> bool:
 
 
 async def music_on(chat_id: int):
+    from AnonXMusic.misc import db
+
     pause[chat_id] = True
+    if db.get(chat_id):
+        db[chat_id][0].resume()
 
 
 async def music_off(chat_id: int):
+    from AnonXMusic.misc import db
+
     pause[chat_id] = False
+    if db.get(chat_id):
+        db[chat_id][0].pause()
 
 
 async def get_active_chats() -> list:
@@ -348,13 +347,25 @@ async def is_active_chat(chat_id: int) -> bool:
 
 
 async def add_active_chat(chat_id: int):
+    from AnonXMusic.utils.scheduler import scheduler
+
     if chat_id not in active:
         active.append(chat_id)
+        scheduler.start_chat(chat_id)
 
 
 async def remove_active_chat(chat_id: int):
+    from AnonXMusic.platforms.downloads import downloads
+    from AnonXMusic.utils.admission import wake
+    from AnonXMusic.utils.edits import dispatcher
+    from AnonXMusic.utils.scheduler import scheduler
+
     if chat_id in active:
         active.remove(chat_id)
+        scheduler.stop_chat(chat_id)
+        dispatcher.forget(chat_id)
+        downloads.cancel_chat(chat_id)
+        wake()
 
 
 async def get_active_video_chats() -> list:
@@ -10,7 +10,9 @@ from pyrogram.errors import (
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from AnonXMusic import YouTube, app
+from AnonXMusic.core.userbot import mark_joined, mark_left
 from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.admincache import get_admins
 from AnonXMusic.utils.database import (
     get_assistant,
     get_cmode,
@@ -21,7 +23,7 @@ from AnonXMusic.utils.database import (
     is_maintenance,
 )
 from AnonXMusic.utils.inline import botplaylist_markup
-from config import PLAYLIST_IMG_URL, SUPPORT_CHAT, adminlist
+from config import PLAYLIST_IMG_URL, SUPPORT_CHAT
 from strings import get_string
 
 links = {}
@@ -93,7 +95,7 @@ def PlayWrapper(command):
         playty = await get_playtype(message.chat.id)
         if playty != "Everyone":
             if message.from_user.id not in SUDOERS:
-                admins = adminlist.get(message.chat.id)
+                admins = await get_admins(message.chat.id)
                 if not admins:
                     return await message.reply_text(_["admin_13"])
                 else:
@@ -124,12 +126,15 @@ def PlayWrapper(command):
                     get.status == ChatMemberStatus.BANNED
                     or get.status == ChatMemberStatus.RESTRICTED
                 ):
+                    if get.status == ChatMemberStatus.BANNED:
+                        mark_left(userbot.num, chat_id)
                     return await message.reply_text(
                         _["call_2"].format(
                             app.mention, userbot.id, userbot.name, userbot.username
                         )
                     )
             except UserNotParticipant:
+                mark_left(userbot.num, chat_id)
                 if chat_id in links:
                     invitelink = links[chat_id]
                 else:
@@ -179,6 +184,7 @@ def PlayWrapper(command):
                     await userbot.resolve_peer(chat_id)
                 except:
                     pass
+            mark_joined(userbot.num, chat_id)
 
         return await command(
             client,
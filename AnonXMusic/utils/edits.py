@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from pyrogram.errors import FloodWait, MessageNotModified
+
+import config
+from AnonXMusic.utils.metrics import incr, set_gauge
+
+MAX_CHAT_INTERVAL = 120
+MAX_REMEMBERED = 5000
+
+
+class EditDispatcher:
+    """Sends reply-markup edits for progress bars.
+
+    Only the newest pending markup of a message is kept, edits that would not
+    change anything are dropped, and every chat waits its own interval between
+    edits. A FloodWait doubles that chat's interval and halves the global rate;
+    successful edits slowly win both back."""
+
+    def __init__(self):
+        self.pending = OrderedDict()
+        self.last = OrderedDict()
+        self.chat_next = {}
+        self.chat_interval = {}
+        self.rate = float(config.EDITS_PER_SECOND)
+        self._wakeup = None
+        self._runner = None
+
+    def submit(self, message, markup):
+        key = (message.chat.id, message.id)
+        rendered = str(markup)
+        if self.last.get(key) == rendered:
+            incr("edits_unchanged")
+            return
+        if key in self.pending:
+            incr("edits_coalesced")
+        self.pending[key] = (message, markup, rendered)
+        set_gauge("edits_pending", len(self.pending))
+        if self._runner is None or self._runner.done():
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def forget(self, chat_id: int):
+        for key in [key for key in self.pending if key[0] == chat_id]:
+            self.pending.pop(key, None)
+        self.chat_next.pop(chat_id, None)
+        self.chat_interval.pop(chat_id, None)
+
+    def _remember(self, key, rendered: str):
+        self.last[key] = rendered
+        self.last.move_to_end(key)
+        if len(self.last) > MAX_REMEMBERED:
+            self.last.popitem(last=False)
+
+    def _next_ready(self, now: float):
+        wait = None
+        for key in self.pending:
+            ready_at = self.chat_next.get(key[0], 0)
+            if ready_at <= now:
+                return key, 0
+            if wait is None or ready_at - now < wait:
+                wait = ready_at - now
+        return None, wait
+
+    async def _run(self):
+        while self.pending:
+            now = time.monotonic()
+            key, wait = self._next_ready(now)
+            if key is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            message, markup, rendered = self.pending.pop(key)
+            set_gauge("edits_pending", len(self.pending))
+            chat_id = key[0]
+            interval = self.chat_interval.get(chat_id, config.EDIT_CHAT_INTERVAL)
+            self.chat_next[chat_id] = now + interval
+            try:
+                await message.edit_reply_markup(reply_markup=markup)
+                self._remember(key, rendered)
+                incr("edits_sent")
+                self.chat_interval[chat_id] = max(
+                    config.EDIT_CHAT_INTERVAL, interval * 0.9
+                )
+                self.rate = min(float(config.EDITS_PER_SECOND), self.rate + 0.5)
+            except FloodWait as e:
+                incr("edits_flood")
+                wait = int(e.value or 1)
+                self.chat_interval[chat_id] = min(MAX_CHAT_INTERVAL, interval * 2)
+                self.chat_next[chat_id] = time.monotonic() + wait
+                self.rate = max(1.0, self.rate / 2)
+                self.pending.setdefault(key, (message, markup, rendered))
+            except MessageNotModified:
+                self._remember(key, rendered)
+            except:
+                incr("edits_failed")
+            set_gauge("edits_rate", round(self.rate, 2))
+            await asyncio.sleep(1 / self.rate)
+
+
+dispatcher = EditDispatcher()
@@ -13,6 +13,10 @@ def queue_markup(
 ):
     not_dur = [
         [
+            InlineKeyboardButton(
+                text=_["QU_B_1"],
+                callback_data=f"GetQueued {CPLAY}|{videoid}",
+            ),
             InlineKeyboardButton(
                 text=_["CLOSE_BUTTON"],
                 callback_data="close",
@@ -20,8 +24,11 @@ def queue_markup(
         ]
     ]
     dur = [
-        
         [
+            InlineKeyboardButton(
+                text=_["QU_B_1"],
+                callback_data=f"GetQueued {CPLAY}|{videoid}",
+            ),
             InlineKeyboardButton(
                 text=_["CLOSE_BUTTON"],
                 callback_data="close",
@@ -32,9 +39,23 @@ def queue_markup(
     return upl
 
 
-def queue_back_markup(_, CPLAY):
+def queue_page_markup(_, CPLAY, page: int, pages: int):
     upl = InlineKeyboardMarkup(
         [
+            [
+                InlineKeyboardButton(
+                    text="◁",
+                    callback_data=f"QueuePage {CPLAY}|{(page - 1) % pages}",
+                ),
+                InlineKeyboardButton(
+                    text=f"{page + 1}/{pages}",
+                    callback_data="GetTimer",
+                ),
+                InlineKeyboardButton(
+                    text="▷",
+                    callback_data=f"QueuePage {CPLAY}|{(page + 1) % pages}",
+                ),
+            ],
             [
                 InlineKeyboardButton(
                     text=_["BACK_BUTTON"],
@@ -44,7 +65,7 @@ def queue_back_markup(_, CPLAY):
                     text=_["CLOSE_BUTTON"],
                     callback_data="close",
                 ),
-            ]
+            ],
         ]
     )
     return upl
@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+SAMPLES = 1024
+MAX_CHATS = 500
+
+
+class Histogram:
+    __slots__ = ("samples", "count", "total", "max")
+
+    def __init__(self):
+        self.samples = deque(maxlen=SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "max": round(self.max, 4),
+        }
+
+
+stages = defaultdict(Histogram)
+assistant_stages = defaultdict(lambda: defaultdict(Histogram))
+chat_stages = OrderedDict()
+counters = defaultdict(int)
+gauges = {}
+
+
+def observe(stage: str, seconds: float, chat_id: int = None, assistant: int = None):
+    stages[stage].observe(seconds)
+    if assistant is not None:
+        assistant_stages[assistant][stage].observe(seconds)
+    if chat_id is not None:
+        if chat_id not in chat_stages:
+            chat_stages[chat_id] = defaultdict(Histogram)
+            if len(chat_stages) > MAX_CHATS:
+                chat_stages.popitem(last=False)
+        else:
+            chat_stages.move_to_end(chat_id)
+        chat_stages[chat_id][stage].observe(seconds)
+
+
+@contextmanager
+def timer(stage: str, chat_id: int = None, assistant: int = None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, chat_id, assistant)
+
+
+def incr(name: str, value: int = 1):
+    counters[name] += value
+
+
+def set_gauge(name: str, value: float):
+    gauges[name] = value
+
+
+def snapshot() -> dict:
+    return {
+        "time": time.time(),
+        "stages": {stage: hist.summary() for stage, hist in stages.items()},
+        "assistants": {
+            num: {stage: hist.summary() for stage, hist in hists.items()}
+            for num, hists in assistant_stages.items()
+        },
+        "chats": {
+            chat_id: {stage: hist.summary() for stage, hist in hists.items()}
+            for chat_id, hists in chat_stages.items()
+        },
+        "counters": dict(counters),
+        "gauges": dict(gauges),
+    }
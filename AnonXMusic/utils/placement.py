@@ -0,0 +1,77 @@
+import time
+from collections import deque
+
+import config
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.database import active, activevideo, assistantdict
+
+# A video call costs roughly three audio calls worth of ffmpeg work.
+VIDEO_WEIGHT = 2.0
+# Every PING_WEIGHT ms of pytgcalls ping counts as one extra call.
+PING_WEIGHT = 100.0
+
+decisions = deque(maxlen=50)
+# chat_id -> assistant a join was admitted on but has not finished yet
+reserved = {}
+
+
+def assistant_ping(assistant: int) -> float:
+    from AnonXMusic.core.call import Anony
+
+    try:
+        return float(Anony.assistant_ping(assistant) or 0)
+    except:
+        return 0.0
+
+
+def get_load() -> dict:
+    from AnonXMusic.core.userbot import assistants
+
+    load = {num: {"calls": 0, "video": 0} for num in assistants}
+    for chat_id in active:
+        num = assistantdict.get(chat_id)
+        if num not in load:
+            continue
+        load[num]["calls"] += 1
+        if chat_id in activevideo:
+            load[num]["video"] += 1
+    for chat_id, num in reserved.items():
+        if num in load and chat_id not in active:
+            load[num]["calls"] += 1
+    for num, info in load.items():
+        info["ping"] = assistant_ping(num)
+        info["score"] = round(
+            info["calls"] + VIDEO_WEIGHT * info["video"] + info["ping"] / PING_WEIGHT,
+            3,
+        )
+    return load
+
+
+def has_room(assistant: int, load: dict) -> bool:
+    if not config.MAX_CALLS_PER_ASSISTANT:
+        return True
+    return load[assistant]["calls"] < config.MAX_CALLS_PER_ASSISTANT
+
+
+def pick_assistant(chat_id: int, exclude: list = None) -> int:
+    load = get_load()
+    for num in exclude or []:
+        load.pop(num, None)
+    if not load:
+        return None
+    free = {num: info for num, info in load.items() if has_room(num, load)}
+    if free:
+        load = free
+    chosen = min(load, key=lambda num: (load[num]["score"], num))
+    decisions.append(
+        {
+            "time": time.time(),
+            "chat_id": chat_id,
+            "assistant": chosen,
+            "scores": {num: info["score"] for num, info in load.items()},
+        }
+    )
+    LOGGER(__name__).info(
+        f"Placed {chat_id} on assistant {chosen} (score {load[chosen]['score']})"
+    )
+    return chosen
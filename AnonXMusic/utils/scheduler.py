@@ -0,0 +1,138 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.metrics import incr, observe, set_gauge
+
+
+class Job:
+    __slots__ = ("key", "callback", "interval", "deadline", "running")
+
+    def __init__(self, key, callback, interval: float = None):
+        self.key = key
+        self.callback = callback
+        self.interval = interval
+        self.deadline = 0.0
+        self.running = False
+
+    @property
+    def name(self) -> str:
+        return self.key[0] if isinstance(self.key, tuple) else str(self.key)
+
+
+class Scheduler:
+    """One heap of deadlines for every background job.
+
+    Jobs are keyed; per-chat jobs use (name, chat_id) keys and are started
+    and cancelled together with the chat through start_chat/stop_chat."""
+
+    def __init__(self):
+        self.heap = []
+        self.jobs = {}
+        self.chat_jobs = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._runner = None
+
+    def every(self, key, interval: float, callback, delay: float = None):
+        return self._add(Job(key, callback, interval), interval if delay is None else delay)
+
+    def once(self, key, delay: float, callback):
+        return self._add(Job(key, callback), delay)
+
+    def cancel(self, key):
+        self.jobs.pop(key, None)
+
+    def per_chat(self, name: str, interval: float, callback, repeat: bool = True):
+        self.chat_jobs[name] = (interval, callback, repeat)
+
+    def start_chat(self, chat_id: int):
+        for name, (interval, callback, repeat) in self.chat_jobs.items():
+            if (name, chat_id) in self.jobs:
+                continue
+            if repeat:
+                self.every((name, chat_id), interval, self._bind(callback, chat_id))
+            else:
+                self.once((name, chat_id), interval, self._bind(callback, chat_id))
+
+    def stop_chat(self, chat_id: int):
+        for name in self.chat_jobs:
+            self.cancel((name, chat_id))
+
+    @staticmethod
+    def _bind(callback, chat_id: int):
+        return lambda: callback(chat_id)
+
+    def _add(self, job: Job, delay: float) -> Job:
+        job.deadline = time.monotonic() + max(0.0, delay)
+        self.jobs[job.key] = job
+        self._push(job)
+        if self._runner is None or self._runner.done():
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+        elif self.heap[0][2] is job:
+            self._wakeup.set()
+        return job
+
+    def _push(self, job: Job):
+        heapq.heappush(self.heap, (job.deadline, next(self._seq), job))
+        if len(self.heap) > 2 * len(self.jobs) + 64:
+            self.heap = [entry for entry in self.heap if not self._stale(entry)]
+            heapq.heapify(self.heap)
+
+    def _stale(self, entry) -> bool:
+        deadline, _, job = entry
+        return self.jobs.get(job.key) is not job or job.deadline != deadline
+
+    async def _run(self):
+        while True:
+            while self.heap and self._stale(self.heap[0]):
+                heapq.heappop(self.heap)
+            set_gauge("scheduler_jobs", len(self.jobs))
+            set_gauge("scheduler_heap", len(self.heap))
+            timeout = None
+            if self.heap:
+                timeout = self.heap[0][0] - time.monotonic()
+            if timeout is None or timeout > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                entry = heapq.heappop(self.heap)
+                if self._stale(entry):
+                    continue
+                job = entry[2]
+                observe("scheduler_lag", now - job.deadline)
+                if job.interval:
+                    job.deadline += job.interval
+                    if job.deadline <= now:
+                        job.deadline = now + job.interval
+                    self._push(job)
+                else:
+                    self.jobs.pop(job.key, None)
+                if job.running:
+                    incr("scheduler_overrun")
+                    continue
+                job.running = True
+                asyncio.create_task(self._call(job))
+
+    async def _call(self, job: Job):
+        started = time.monotonic()
+        try:
+            await job.callback()
+        except Exception as e:
+            incr("scheduler_errors")
+            LOGGER(__name__).warning(
+                f"Scheduled job {job.name} failed: {type(e).__name__} {e}"
+            )
+        finally:
+            job.running = False
+            observe(f"job_{job.name}", time.monotonic() - started)
+
+
+scheduler = Scheduler()
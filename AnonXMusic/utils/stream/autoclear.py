@@ -1,18 +1,102 @@
+import asyncio
 import os
+import time
 
-from config import autoclean
+import config
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+
+MEDIA_DIRS = ["downloads", "cache", "playback"]
+
+# file path -> number of queue entries referring to it
+references = {}
+
+
+def _deletable(path: str) -> bool:
+    if not path or path.startswith("http"):
+        return False
+    if "vid_" in path or "live_" in path or "index_" in path:
+        return False
+    folder = os.path.relpath(os.path.abspath(path), os.getcwd()).split(os.sep)[0]
+    return folder in MEDIA_DIRS
+
+
+def hold(path: str):
+    references[path] = references.get(path, 0) + 1
+
+
+def release(path: str):
+    if path not in references:
+        return
+    count = references[path] - 1
+    if count > 0:
+        references[path] = count
+        return
+    references.pop(path, None)
+    if _deletable(path):
+        try:
+            os.remove(path)
+        except:
+            pass
 
 
 async def auto_clean(popped):
     try:
-        rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+        release(popped["file"])
     except:
         pass
+
+
+def _in_use() -> tuple:
+    paths = {os.path.abspath(path) for path in references}
+    names = set()
+    for queue in list(db.values()):
+        for track in list(queue):
+            names.add(str(track.get("vidid")))
+            if track.get("speed_path"):
+                paths.add(os.path.abspath(track["speed_path"]))
+    paths.add(os.path.abspath(config.QUEUE_SNAPSHOT))
+    paths.add(os.path.abspath(f"{config.QUEUE_SNAPSHOT}.tmp"))
+    return paths, names
+
+
+def sweep(budget: int, paths: set, names: set) -> tuple:
+    files = []
+    total = 0
+    for folder in MEDIA_DIRS:
+        for root, _, filenames in os.walk(folder):
+            for name in filenames:
+                path = os.path.abspath(os.path.join(root, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                files.append((stat.st_mtime, stat.st_size, path))
+    if total <= budget:
+        return 0, total
+    target = int(budget * 0.9)
+    freed = 0
+    for _, size, path in sorted(files):
+        if total - freed <= target:
+            break
+        if path in paths or os.path.basename(path).split(".")[0] in names:
+            continue
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+    return freed, total
+
+
+async def sweep_media():
+    started = time.monotonic()
+    paths, names = _in_use()
+    freed, total = await asyncio.get_running_loop().run_in_executor(
+        None, sweep, config.MEDIA_DISK_BUDGET * 1024 * 1024, paths, names
+    )
+    if freed:
+        LOGGER(__name__).info(
+            f"Freed {freed // (1024 * 1024)}MB of {total // (1024 * 1024)}MB media in {time.monotonic() - started:.2f}s"
+        )
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+import config
+from AnonXMusic.core.mongo import mongodb
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.utils.database import (
+    activevideo,
+    add_active_chat,
+    add_active_video_chat,
+    assistantdict,
+    get_active_chats,
+    get_loop,
+    is_music_playing,
+    music_off,
+    music_on,
+    set_loop,
+)
+from AnonXMusic.utils.stream.autoclear import hold
+from AnonXMusic.utils.stream.prefetch import schedule_prefetch
+
+queuedb = mongodb.queues
+
+# Message objects and other runtime-only values that cannot be restored.
+# "played" moves every second, so it is kept per chat and written on its own.
+SKIPPED_KEYS = ["mystic", "played"]
+BATCH_SIZE = 500
+# Seconds the saved position of a playing track may lag before it is written again
+PLAYED_SAVE_INTERVAL = 60
+
+last_saved = None
+# chat_id -> queue state last written to mongo, as json without "played"
+saved_chats = {}
+# chat_id -> "played" last written
+saved_played = {}
+
+
+def _entry(item: dict) -> dict:
+    return {key: value for key, value in item.items() if key not in SKIPPED_KEYS}
+
+
+async def snapshot_queues() -> dict:
+    chats = {}
+    for chat_id in list(await get_active_chats()):
+        queue = db.get(chat_id)
+        if not queue:
+            continue
+        chats[str(chat_id)] = {
+            "queue": [_entry(item) for item in queue],
+            "played": int(queue[0].get("played") or 0),
+            "loop": await get_loop(chat_id),
+            "playing": await is_music_playing(chat_id),
+            "video": chat_id in activevideo,
+            "assistant": assistantdict.get(chat_id),
+        }
+    return chats
+
+
+def _render(state: dict) -> str:
+    return json.dumps(
+        {key: value for key, value in state.items() if key != "played"},
+        default=str,
+        sort_keys=True,
+    )
+
+
+def _render_all(chats: dict) -> dict:
+    return {chat_id: _render(state) for chat_id, state in chats.items()}
+
+
+def _played_stale(chat_id: str, played: int) -> bool:
+    last = saved_played.get(chat_id)
+    return last is None or abs(played - last) >= PLAYED_SAVE_INTERVAL
+
+
+def _write(path: str, data: str):
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    temp = f"{path}.tmp"
+    with open(temp, "w") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+
+
+async def _save_mongo(chats: dict):
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(None, _render_all, chats)
+    changed = {}
+    operations = []
+    for chat_id, state in chats.items():
+        data = rendered[chat_id]
+        played = state["played"]
+        if saved_chats.get(chat_id) != data:
+            changed[chat_id] = data
+            document = json.loads(data)
+            document["played"] = played
+            operations.append(
+                ReplaceOne(
+                    {"chat_id": chat_id},
+                    {"chat_id": chat_id, "state": document},
+                    upsert=True,
+                )
+            )
+        elif _played_stale(chat_id, played):
+            operations.append(
+                UpdateOne({"chat_id": chat_id}, {"$set": {"state.played": played}})
+            )
+        else:
+            continue
+        saved_played[chat_id] = played
+    removed = [chat_id for chat_id in saved_chats if chat_id not in chats]
+    for chat_id in removed:
+        operations.append(DeleteOne({"chat_id": chat_id}))
+    for index in range(0, len(operations), BATCH_SIZE):
+        await queuedb.bulk_write(
+            operations[index : index + BATCH_SIZE], ordered=False
+        )
+    saved_chats.update(changed)
+    for chat_id in removed:
+        saved_chats.pop(chat_id, None)
+        saved_played.pop(chat_id, None)
+
+
+def _render_file(chats: dict) -> tuple:
+    compared = json.dumps(_render_all(chats), sort_keys=True)
+    return compared, json.dumps(chats, default=str, sort_keys=True)
+
+
+async def save_queues():
+    global last_saved
+    chats = await snapshot_queues()
+    if config.QUEUE_BACKEND == "mongo":
+        return await _save_mongo(chats)
+    loop = asyncio.get_running_loop()
+    compared, data = await loop.run_in_executor(None, _render_file, chats)
+    if compared == last_saved and not any(
+        _played_stale(chat_id, state["played"]) for chat_id, state in chats.items()
+    ):
+        return
+    await loop.run_in_executor(None, _write, config.QUEUE_SNAPSHOT, data)
+    last_saved = compared
+    saved_played.clear()
+    saved_played.update({chat_id: state["played"] for chat_id, state in chats.items()})
+
+
+def _read(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+async def _restore_chat(chat_id: int, state: dict):
+    from AnonXMusic.core.call import Anony, _clear_
+
+    db[chat_id] = state["queue"]
+    if "played" in state:
+        db[chat_id][0]["played"] = state["played"]
+    for item in state["queue"]:
+        hold(item["file"])
+    await set_loop(chat_id, state.get("loop", 0))
+    if state.get("assistant"):
+        assistantdict[chat_id] = state["assistant"]
+    if state.get("playing", True):
+        await music_on(chat_id)
+    else:
+        await music_off(chat_id)
+    try:
+        await Anony.restart_stream(chat_id)
+    except Exception as e:
+        await _clear_(chat_id)
+        LOGGER(__name__).warning(
+            f"Could not resume the queue of {chat_id}: {type(e).__name__}"
+        )
+        return False
+    await add_active_chat(chat_id)
+    if state.get("video"):
+        await add_active_video_chat(chat_id)
+    schedule_prefetch(chat_id)
+    return True
+
+
+async def _read_mongo() -> dict:
+    chats = {}
+    async for document in queuedb.find({}):
+        chats[document["chat_id"]] = document["state"]
+        saved_chats[document["chat_id"]] = _render(document["state"])
+        saved_played[document["chat_id"]] = document["state"].get("played")
+    return chats
+
+
+async def restore_queues():
+    try:
+        if config.QUEUE_BACKEND == "mongo":
+            chats = await _read_mongo()
+        else:
+            chats = await asyncio.get_running_loop().run_in_executor(
+                None, _read, config.QUEUE_SNAPSHOT
+            )
+    except Exception as e:
+        LOGGER(__name__).warning(f"Could not read saved queues: {type(e).__name__} {e}")
+        return
+    if not chats:
+        return
+    semaphore = asyncio.Semaphore(10)
+
+    async def restore(chat_id, state):
+        async with semaphore:
+            return await _restore_chat(int(chat_id), state)
+
+    results = await asyncio.gather(
+        *(restore(chat_id, state) for chat_id, state in chats.items()),
+        return_exceptions=True,
+    )
+    resumed = len([result for result in results if result is True])
+    LOGGER(__name__).info(f"Resumed {resumed}/{len(chats)} saved queues.")
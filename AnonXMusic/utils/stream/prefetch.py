@@ -0,0 +1,103 @@
+import asyncio
+import os
+from itertools import islice
+
+from AnonXMusic import YouTube
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.platforms.downloads import NEXT
+from AnonXMusic.utils.thumbnails import get_thumb
+
+prepared = {}
+tasks = {}
+
+
+def schedule_prefetch(chat_id: int):
+    check = db.get(chat_id)
+    if not check or len(check) < 2:
+        return
+    entry = check[1]
+    ready = prepared.get(chat_id)
+    if ready and ready["entry"] is entry:
+        return
+    task = tasks.get(chat_id)
+    if task and not task.done():
+        if task.entry is entry:
+            return
+        task.cancel()
+    prepared.pop(chat_id, None)
+    task = asyncio.create_task(_prepare(chat_id, entry))
+    task.entry = entry
+    tasks[chat_id] = task
+
+
+def take_prepared(chat_id: int, entry) -> dict:
+    ready = prepared.pop(chat_id, None)
+    if ready and ready["entry"] is entry:
+        return ready
+    return None
+
+
+def clear_prepared(chat_id: int):
+    prepared.pop(chat_id, None)
+    task = tasks.pop(chat_id, None)
+    if task and not task.done():
+        task.cancel()
+
+
+async def _prepare(chat_id: int, entry):
+    queued = entry["file"]
+    videoid = entry["vidid"]
+    video = str(entry["streamtype"]) == "video"
+    ready = {"entry": entry, "img": None}
+    try:
+        if "live_" in queued:
+            n, link = await YouTube.video(videoid, True)
+            if n == 0:
+                return
+            ready["link"] = link
+        elif "vid_" in queued:
+            file_path, direct = await YouTube.download(
+                videoid,
+                None,
+                videoid=True,
+                video=video,
+                chat_id=chat_id,
+                priority=NEXT,
+            )
+            if not file_path:
+                return
+            if direct and os.path.isfile(file_path):
+                if os.path.getsize(file_path) == 0:
+                    return
+            ready["link"] = file_path
+        elif "index_" in queued:
+            ready["link"] = videoid
+        else:
+            if not queued.startswith("http") and not os.path.isfile(queued):
+                return
+            ready["link"] = queued
+        if videoid not in ["telegram", "soundcloud"] and "index_" not in queued:
+            ready["img"] = await get_thumb(videoid)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        LOGGER(__name__).warning(f"Prefetch failed for {chat_id}: {type(e).__name__}")
+        return
+    finally:
+        if tasks.get(chat_id) is asyncio.current_task():
+            tasks.pop(chat_id, None)
+    check = db.get(chat_id)
+    if check and any(item is entry for item in islice(check, 2)):
+        prepared[chat_id] = ready
+
+
+async def refresh_stream_urls():
+    vidids = [
+        track["vidid"]
+        for queue in list(db.values())
+        for track in list(queue)
+        if "live_" in str(track.get("file")) or "vid_" in str(track.get("file"))
+    ]
+    if vidids:
+        await YouTube.refresh_videos(vidids)
@@ -1,9 +1,12 @@
 import asyncio
 from typing import Union
 
+from AnonXMusic.core.track import Track
 from AnonXMusic.misc import db
 from AnonXMusic.utils.formatters import check_duration, seconds_to_min
-from config import autoclean, time_to_seconds
+from AnonXMusic.utils.stream.autoclear import hold
+from AnonXMusic.utils.stream.prefetch import schedule_prefetch
+from config import time_to_seconds
 
 
 async def put_queue(
@@ -23,18 +26,18 @@ async def put_queue(
         duration_in_seconds = time_to_seconds(duration) - 3
     except:
         duration_in_seconds = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "user_id": user_id,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": duration_in_seconds,
-        "played": 0,
-    }
+    put = Track(
+        title=title,
+        dur=duration,
+        streamtype=stream,
+        by=user,
+        user_id=user_id,
+        chat_id=original_chat_id,
+        file=file,
+        vidid=vidid,
+        seconds=duration_in_seconds,
+        played=0,
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
@@ -44,7 +47,8 @@ async def put_queue(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
-    autoclean.append(file)
+    hold(file)
+    schedule_prefetch(chat_id)
 
 
 async def put_queue_index(
@@ -69,17 +73,17 @@ async def put_queue_index(
             dur = 0
     else:
         dur = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": dur,
-        "played": 0,
-    }
+    put = Track(
+        title=title,
+        dur=duration,
+        streamtype=stream,
+        by=user,
+        chat_id=original_chat_id,
+        file=file,
+        vidid=vidid,
+        seconds=dur,
+        played=0,
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
@@ -89,3 +93,4 @@ async def put_queue_index(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
+    schedule_prefetch(chat_id)
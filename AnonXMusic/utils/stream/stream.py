@@ -8,6 +8,7 @@ import config
 from AnonXMusic import Carbon, YouTube, app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import db
+from AnonXMusic.platforms.downloads import BACKGROUND, NEXT, NOW
 from AnonXMusic.utils.database import add_active_video_chat, is_active_chat
 from AnonXMusic.utils.exceptions import AssistantErr
 from AnonXMusic.utils.inline import aq_markup, close_markup, stream_markup
@@ -75,7 +76,7 @@ async def stream(
                 status = True if video else None
                 try:
                     file_path, direct = await YouTube.download(
-                        vidid, mystic, video=status, videoid=True
+                        vidid, mystic, video=status, videoid=True, chat_id=chat_id
                     )
                 except:
                     raise AssistantErr(_["play_14"])
@@ -85,6 +86,7 @@ async def stream(
                     file_path,
                     video=status,
                     image=thumbnail,
+                    mystic=mystic,
                 )
                 await put_queue(
                     chat_id,
@@ -137,9 +139,20 @@ async def stream(
         duration_min = result["duration_min"]
         thumbnail = result["thumb"]
         status = True if video else None
+        if not await is_active_chat(chat_id):
+            priority = NOW
+        elif len(db.get(chat_id) or []) < 2:
+            priority = NEXT
+        else:
+            priority = BACKGROUND
         try:
             file_path, direct = await YouTube.download(
-                vidid, mystic, videoid=True, video=status
+                vidid,
+                mystic,
+                videoid=True,
+                video=status,
+                chat_id=chat_id,
+                priority=priority,
             )
         except:
             raise AssistantErr(_["play_14"])
@@ -171,6 +184,7 @@ async def stream(
                 file_path,
                 video=status,
                 image=thumbnail,
+                mystic=mystic,
             )
             await put_queue(
                 chat_id,
@@ -225,7 +239,9 @@ async def stream(
         else:
             if not forceplay:
                 db[chat_id] = []
-            await Anony.join_call(chat_id, original_chat_id, file_path, video=None)
+            await Anony.join_call(
+                chat_id, original_chat_id, file_path, video=None, mystic=mystic
+            )
             await put_queue(
                 chat_id,
                 original_chat_id,
@@ -279,7 +295,9 @@ async def stream(
         else:
             if not forceplay:
                 db[chat_id] = []
-            await Anony.join_call(chat_id, original_chat_id, file_path, video=status)
+            await Anony.join_call(
+                chat_id, original_chat_id, file_path, video=status, mystic=mystic
+            )
             await put_queue(
                 chat_id,
                 original_chat_id,
@@ -342,6 +360,7 @@ async def stream(
                 file_path,
                 video=status,
                 image=thumbnail if thumbnail else None,
+                mystic=mystic,
             )
             await put_queue(
                 chat_id,
@@ -399,6 +418,7 @@ async def stream(
                 original_chat_id,
                 link,
                 video=True if video else None,
+                mystic=mystic,
             )
             await put_queue_index(
                 chat_id,
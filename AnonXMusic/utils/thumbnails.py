@@ -9,9 +9,9 @@ from PIL import Image, ImageDraw, ImageEnhance
 from PIL import ImageFilter, ImageFont, ImageOps
 
 from unidecode import unidecode
-from youtubesearchpython.__future__ import VideosSearch
 
 from AnonXMusic import app
+from AnonXMusic.platforms.metadata import metadata
 from config import YOUTUBE_IMG_URL
 
 
@@ -39,8 +39,7 @@ async def get_thumb(videoid):
 
     url = f"https://www.youtube.com/watch?v={videoid}"
     try:
-        results = VideosSearch(url, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await metadata.search(url):
             try:
                 title = result["title"]
                 title = re.sub("\W+", " ", title)
@@ -1,5 +1,6 @@
+import logging
 import re
-from os import getenv
+from os import environ, getenv
 
 from dotenv import load_dotenv
 from pyrogram import filters
@@ -44,6 +45,9 @@ SUPPORT_CHAT = getenv("SUPPORT_CHAT", "https://t.me/Mahadev_Update")
 
 # Set this to True if you want the assistant to automatically leave chats after an interval
 AUTO_LEAVING_ASSISTANT = bool(getenv("AUTO_LEAVING_ASSISTANT", False))
+# Most idle chats each assistant leaves per sweep, and the seconds it waits between two leaves
+AUTO_LEAVE_LIMIT = int(getenv("AUTO_LEAVE_LIMIT", 20))
+AUTO_LEAVE_DELAY = float(getenv("AUTO_LEAVE_DELAY", 3))
 
 PRIVATE_BOT_MODE = getenv("PRIVATE_BOT_MODE", None)
 PRIVATE_BOT_MODE_MEM = int(getenv("PRIVATE_BOT_MODE_MEM", 0))
@@ -64,18 +68,84 @@ TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 1073741824))
 
 
 # Get your pyrogram v2 session from @StringFatherBot on Telegram
-STRING1 = getenv("STRING_SESSION", None)
-STRING2 = getenv("STRING_SESSION2", None)
-STRING3 = getenv("STRING_SESSION3", None)
-STRING4 = getenv("STRING_SESSION4", None)
-STRING5 = getenv("STRING_SESSION5", None)
+# Any number of assistants can be added as STRING_SESSION, STRING_SESSION2, STRING_SESSION3, ...
+STRING_SESSIONS = {}
+_SESSION_KEYS = {}
+for _key in sorted(environ):
+    _match = re.fullmatch(r"STRING_SESSION(\d*)", _key)
+    if not _match or not environ[_key]:
+        continue
+    _num = int(_match.group(1) or 1)
+    if _num == 0:
+        logging.getLogger(__name__).error(
+            f"[ERROR] - {_key} is ignored: assistant numbers start at 1, use STRING_SESSION1 or higher."
+        )
+        continue
+    if _num in STRING_SESSIONS:
+        logging.getLogger(__name__).error(
+            f"[ERROR] - {_key} is ignored: assistant {_num} is already set by {_SESSION_KEYS[_num]}."
+        )
+        continue
+    STRING_SESSIONS[_num] = environ[_key]
+    _SESSION_KEYS[_num] = _key
+STRING_SESSIONS = dict(sorted(STRING_SESSIONS.items()))
+
+# Run the assistants' voice chat clients in this many separate worker processes (0 keeps them inside the bot process)
+CALL_WORKERS = int(getenv("CALL_WORKERS", 0))
+
+# How many assistant clients are brought up at once during boot, and how long each one may take
+STARTUP_CONCURRENCY = int(getenv("STARTUP_CONCURRENCY", 3))
+STARTUP_TIMEOUT = int(getenv("STARTUP_TIMEOUT", 60))
+
+# Seconds between stuck-stream checks, and how far (in seconds) a stream may fall behind the clock before it is restarted
+WATCHDOG_INTERVAL = int(getenv("WATCHDOG_INTERVAL", 15))
+WATCHDOG_DRIFT = int(getenv("WATCHDOG_DRIFT", 20))
+
+# File the queues are saved to every QUEUE_SNAPSHOT_INTERVAL seconds, so a restart can resume them
+# (kept outside cache/, downloads/ and raw_files/, which /restart wipes)
+QUEUE_SNAPSHOT = getenv("QUEUE_SNAPSHOT", "queues.json")
+QUEUE_SNAPSHOT_INTERVAL = int(getenv("QUEUE_SNAPSHOT_INTERVAL", 10))
+# Where queues are saved: "file" (QUEUE_SNAPSHOT) or "mongo" (the queues collection, batched per interval)
+QUEUE_BACKEND = getenv("QUEUE_BACKEND", "file").lower()
+
+# Most voice chats an assistant may stream in at once (0 for no limit), and how many it may be joining at the same time
+MAX_CALLS_PER_ASSISTANT = int(getenv("MAX_CALLS_PER_ASSISTANT", 0))
+MAX_SETUPS_PER_ASSISTANT = int(getenv("MAX_SETUPS_PER_ASSISTANT", 3))
+# Seconds a /play may wait for a free voice slot before giving up
+JOIN_QUEUE_TIMEOUT = int(getenv("JOIN_QUEUE_TIMEOUT", 120))
+
+# Megabytes downloads/, cache/ and playback/ may use together before the oldest unused files are removed (0 disables the sweeper)
+MEDIA_DISK_BUDGET = int(getenv("MEDIA_DISK_BUDGET", 2048))
+MEDIA_SWEEP_INTERVAL = int(getenv("MEDIA_SWEEP_INTERVAL", 300))
+
+# Threads that keep a warm yt-dlp extractor each, and the seconds one extraction may take
+YTDLP_WORKERS = int(getenv("YTDLP_WORKERS", 4))
+YTDLP_TIMEOUT = int(getenv("YTDLP_TIMEOUT", 60))
+
+# YouTube search results kept per video id: how many, for how many seconds, and the file they survive restarts in (empty keeps them in memory only)
+METADATA_CACHE_SIZE = int(getenv("METADATA_CACHE_SIZE", 2000))
+METADATA_CACHE_TTL = int(getenv("METADATA_CACHE_TTL", 21600))
+METADATA_CACHE_FILE = getenv("METADATA_CACHE_FILE", "cache/metadata.json")
+
+# Downloads allowed at once for the track a chat is about to hear, for next-up prefetches and for background work,
+# and the seconds between progress updates on the "downloading" message
+DOWNLOADS_NOW = int(getenv("DOWNLOADS_NOW", 4))
+DOWNLOADS_NEXT = int(getenv("DOWNLOADS_NEXT", 2))
+DOWNLOADS_BACKGROUND = int(getenv("DOWNLOADS_BACKGROUND", 1))
+DOWNLOAD_PROGRESS_INTERVAL = int(getenv("DOWNLOAD_PROGRESS_INTERVAL", 5))
+
+# Progress-bar edits the bot may send per second overall, and the fewest seconds between two edits in one chat (both back off on FloodWait)
+EDITS_PER_SECOND = int(getenv("EDITS_PER_SECOND", 20))
+EDIT_CHAT_INTERVAL = int(getenv("EDIT_CHAT_INTERVAL", 5))
+
+# Seconds a chat's admin list is trusted before it is listed again (admin changes also drop it right away)
+ADMIN_CACHE_TTL = int(getenv("ADMIN_CACHE_TTL", 1800))
 
 
 BANNED_USERS = filters.user()
 adminlist = {}
 lyrical = {}
 votemode = {}
-autoclean = []
 confirmer = {}
 
 